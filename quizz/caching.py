@@ -0,0 +1,108 @@
+"""
+Caching of expensive values (e.g. aggregates displayed in the management
+views), protected against stampedes.
+
+A cached value is fresh for some time, then stale for some more time. Stale
+values are still served while a single process refreshes them in the
+background. When there is no value at all, a single process computes it, and
+the others wait for it instead of computing it too.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connections
+
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+
+def _store(key, value, fresh_for, stale_for):
+    cache.set(key, (value, time.time() + fresh_for), fresh_for + stale_for)
+
+
+def _refresh(key, compute, fresh_for, stale_for):
+    """
+    Computes and stores a value, then releases the lock of its key, which
+    must be held by the caller.
+
+    :return: The computed value.
+    """
+    try:
+        value = compute()
+        _store(key, value, fresh_for, stale_for)
+        return value
+    finally:
+        cache.delete(_lock_key(key))
+
+
+def _refresh_in_background(key, compute, fresh_for, stale_for):
+    def refresh():
+        try:
+            _refresh(key, compute, fresh_for, stale_for)
+        finally:
+            # The thread has its own database connections, that would else be
+            # left open.
+            connections.close_all()
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def get_or_refresh(
+    key,
+    compute,
+    fresh_for,
+    stale_for=3600,
+    lock_timeout=30,
+    wait_for=5,
+    background=True,
+):
+    """
+    Returns a cached value, computing it if needed, so that it's computed by a
+    single process at a time.
+
+    :param key: The cache key.
+    :param compute: A callable computing the value.
+    :param fresh_for: How long a computed value is served as is, in seconds.
+    :param stale_for: How long a value is still served after that, while it's
+                      refreshed, in seconds.
+    :param lock_timeout: How long a process is allowed to compute the value,
+                         in seconds. After that, another one may compute it.
+    :param wait_for: If there is no value at all and another process computes
+                     it, how long to wait for it before computing it anyway, in
+                     seconds.
+    :param background: If True, stale values are refreshed in a thread, else
+                       the process refreshing them waits for the new value.
+    :return: The value.
+    """
+    entry = cache.get(key)
+
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until:
+            return value
+
+        # Stale: a single process refreshes the value, the others serve the
+        # stale one.
+        if not cache.add(_lock_key(key), True, lock_timeout):
+            return value
+
+        if background:
+            _refresh_in_background(key, compute, fresh_for, stale_for)
+            return value
+
+        return _refresh(key, compute, fresh_for, stale_for)
+
+    if cache.add(_lock_key(key), True, lock_timeout):
+        return _refresh(key, compute, fresh_for, stale_for)
+
+    deadline = time.time() + wait_for
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+
+    return compute()
@@ -0,0 +1,18 @@
+"""
+Values shared by the models and the modules working on plain data (e.g.
+grading), which must not depend on Django's models.
+"""
+
+from enum import Enum
+
+
+class QuestionSuccess(Enum):
+    """
+    For MCQ and linked answers, the success status will always be
+    PERFECT or FAILED. For open answers, if the text entered is very
+    close to the valid answer, we'll grant an ALMOST.
+    """
+
+    PERFECT = "PERFECT"
+    ALMOST = "ALMOST"
+    FAILED = "FAILED"
@@ -2,10 +2,25 @@ from django import forms
 from django.utils.translation import gettext_lazy as _
 
 from quizz.fields import TreeNodeAllMultipleChoiceField
-from quizz.models import Tag, QuestionLocale, Contest
+from quizz.models import (
+    Tag,
+    QuestionLocale,
+    Contest,
+    QUESTION_MCQ,
+    QUESTION_OPEN,
+    QUESTION_LINKED,
+)
 from quizz.widgets import CheckboxTreeSelectMultiple
 
 
+"""The mixes of questions types users can choose from, with each type's share."""
+QUESTIONS_TYPES_MIXES = {
+    "mcq": {QUESTION_MCQ: 100},
+    "mostly-mcq": {QUESTION_MCQ: 60, QUESTION_OPEN: 20, QUESTION_LINKED: 20},
+    "balanced": {QUESTION_MCQ: 1, QUESTION_OPEN: 1, QUESTION_LINKED: 1},
+}
+
+
 class CreateQuizzForm(forms.Form):
     how_many = forms.IntegerField(
         label=_("How many questions?"),
@@ -39,6 +54,18 @@ class CreateQuizzForm(forms.Form):
         widget=forms.RadioSelect,
     )
 
+    types = forms.ChoiceField(
+        label=_("Questions types"),
+        choices=(
+            ("mcq", _("Multiple choices only")),
+            ("mostly-mcq", _("Mostly multiple choices")),
+            ("balanced", _("All types equally")),
+        ),
+        required=False,
+        initial="mcq",
+        widget=forms.RadioSelect,
+    )
+
     locale = forms.ModelChoiceField(
         label=_("Language"),
         queryset=QuestionLocale.objects.all(),
@@ -53,3 +80,18 @@ class CreateQuizzForm(forms.Form):
         required=False,
         empty_label=_("All contests, plus exclusive training questions"),
     )
+
+    prefer_unseen = forms.BooleanField(
+        label=_("Prefer questions I never answered"),
+        required=False,
+        initial=False,
+    )
+
+    adaptive = forms.BooleanField(
+        label=_("Review the questions I failed"),
+        required=False,
+        initial=False,
+    )
+
+    def clean_types(self):
+        return QUESTIONS_TYPES_MIXES[self.cleaned_data["types"] or "mcq"]
@@ -43,7 +43,7 @@ class MultipleChoicesQuestionForm(QuestionForm):
         )
 
         choices = [
-            (answer.pk, answer.answer) for answer in self.question.selectable_answers
+            (pk, answer) for pk, answer, _is_correct in self.question.snapshot.choices
         ]
         random.shuffle(choices)
 
@@ -79,7 +79,7 @@ class LinkedQuestionForm(QuestionForm):
             % self.question.type
         )
 
-        answers = self.question.selectable_answers_with_pk
+        answers = list(self.question.snapshot.pairs)
         linked_answers = [(answer[1][0], answer[1][1]) for answer in answers]
 
         random.shuffle(answers)
@@ -0,0 +1,177 @@
+"""
+The scoring rules of the questions, working on plain data only.
+
+These functions know nothing about the database: they are used both to grade
+the answers submitted by users, and to re-grade past answers in bulk (see the
+`rescore_quizzes` management command).
+"""
+
+from quizz.constants import QuestionSuccess
+from quizz.text_processors import normalized_levenshtein_distance
+
+
+def open_answer_score(valid_answer, answer):
+    """
+    Compares an open answer to the valid one, ignoring spaces, punctuation,
+    case and accents.
+
+    :param valid_answer: The valid answer, already normalized (see
+                         `text_processors.normalize`).
+    :param answer: The user's answer.
+    :return: 1.0 if the answers are the same, 0.5 if they are close (less than
+             four differences), 0.0 else.
+    """
+    distance = normalized_levenshtein_distance(valid_answer or "", answer or "")
+
+    if distance == 0:
+        return 1.0
+    elif distance < 4:
+        return 0.5
+    else:
+        return 0.0
+
+
+def grade_open(difficulty, valid_answer, answer):
+    """
+    Grades the answer to an open question.
+
+    :param difficulty: The question's difficulty (i.e. its maximal points).
+    :param valid_answer: The valid answer, already normalized.
+    :param answer: The user's answer.
+    :return: A tuple (points, success), success being a QuestionSuccess value.
+    """
+    score = open_answer_score(valid_answer, answer)
+
+    if score == 1.0:
+        return difficulty, QuestionSuccess.PERFECT.value
+    elif score == 0.5:
+        return float(difficulty) / 2.0, QuestionSuccess.ALMOST.value
+    else:
+        return 0, QuestionSuccess.FAILED.value
+
+
+def grade_mcq(
+    difficulty,
+    answers,
+    checked,
+    has_open_choice=False,
+    open_valid_answer=None,
+    open_answer=None,
+):
+    """
+    Grades the answer to a multiple-choices question.
+
+    Points are awarded in proportion to the correctly ticked answers, with a
+    penalty if incorrect answers are ticked, to penalize those who would seek
+    to maximize their points by systematically tick all answers. In the case
+    of an open answer, it reports such an exact point, half a point if it is
+    close, and none otherwise.
+
+    :param difficulty: The question's difficulty (i.e. its maximal points).
+    :param answers: An iterable of (pk, is_correct) tuples for the proposed
+                    answers.
+    :param checked: A set of the primary keys of the answers checked by the
+                    user.
+    :param has_open_choice: True if the question has an “Other” open answer.
+    :param open_valid_answer: The valid open answer, already normalized. If
+                              empty, the open answer must be left blank.
+    :param open_answer: The user's open answer.
+    :return: A tuple (points, success), success being a QuestionSuccess value.
+    """
+    correct_answers = 0
+    correct_user_answers = 0
+    wrong_user_answers_checked = 0
+
+    open_answer_points = 0.0
+    open_answer_count = 0
+
+    if has_open_choice:
+        open_answer_count = 1
+
+        # If the open answer should be left blank and the user entered
+        # something, we don't consider this as an almost-good answer with less
+        # than 4 characters (that what the distance would yield). Instead, the
+        # answer is immediately considered wrong.
+        if not (open_valid_answer or "").strip() and (open_answer or "").strip():
+            open_answer_points = 0.0
+        else:
+            open_answer_points = open_answer_score(open_valid_answer, open_answer)
+
+    for pk, is_correct in answers:
+        user_checked = pk in checked
+
+        if is_correct:
+            correct_answers += 1
+            if user_checked:
+                correct_user_answers += 1
+        elif user_checked:
+            wrong_user_answers_checked += 1
+
+    # For questions with answers, we calculate normally the points.
+    # For questions without any valid checked answer, we give all the points if
+    # the question is left blank, and none else.
+    if correct_answers > 0:
+        points = max(
+            difficulty
+            * (
+                float(
+                    correct_user_answers
+                    - wrong_user_answers_checked
+                    + open_answer_points
+                )
+                / float(correct_answers + open_answer_count)
+            ),
+            0,
+        )
+    elif (
+        correct_user_answers == 0
+        and wrong_user_answers_checked == 0
+        and (open_answer_count == 0 or open_answer_points > 0.99)
+    ):
+        points = difficulty
+    else:
+        points = 0
+
+    if (
+        (0 < correct_answers == correct_user_answers) or wrong_user_answers_checked == 0
+    ) and (open_answer_count == 0 or open_answer_points > 0.99):
+        success = QuestionSuccess.PERFECT.value
+    elif (correct_user_answers == correct_answers - 1 and correct_user_answers > 1) or (
+        open_answer_count == 1 and open_answer_points > 0.49 and open_answer
+    ):
+        success = QuestionSuccess.ALMOST.value
+    else:
+        success = QuestionSuccess.FAILED.value
+
+    return points, success
+
+
+def grade_linked(difficulty, pairs, links):
+    """
+    Grades the answer to a linked question. Unlinked or badly-linked answers
+    gives no points.
+
+    :param difficulty: The question's difficulty (i.e. its maximal points).
+    :param pairs: A dict associating the primary key of each proposed answer
+                  to the primary key of the answer it should be linked to.
+    :param links: A dict associating the primary key of each proposed answer
+                  to the primary key of the answer the user linked it to.
+    :return: A tuple (points, success), success being a QuestionSuccess value.
+    """
+    if not pairs:
+        return 0, QuestionSuccess.FAILED.value
+
+    correct_user_answers = sum(
+        1 for answer, linked in pairs.items() if links.get(answer) == linked
+    )
+
+    points = difficulty * (float(correct_user_answers) / len(pairs))
+
+    if correct_user_answers == len(pairs):
+        success = QuestionSuccess.PERFECT.value
+    elif correct_user_answers == len(pairs) - 1 and correct_user_answers > 1:
+        success = QuestionSuccess.ALMOST.value
+    else:
+        success = QuestionSuccess.FAILED.value
+
+    return points, success
@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from quizz.models import Contest, QuestionLocale, Quizz
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates quizzes in advance for the most common criteria (see the "
+        "QUIZZ_WARM_POOL_CRITERIA setting), so they can be claimed instantly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=settings.QUIZZ_WARM_POOL_SIZE,
+            help="How many quizzes to keep available for each criteria.",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep running, refilling the pool periodically.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="With --watch, the delay between two refills, in seconds.",
+        )
+
+    def handle(self, *args, size, watch, interval, **options):
+        while True:
+            for criteria in settings.QUIZZ_WARM_POOL_CRITERIA:
+                self.refill(dict(criteria), size)
+
+            if not watch:
+                break
+
+            time.sleep(interval)
+
+    def refill(self, criteria, size):
+        if criteria.get("locale"):
+            criteria["locale"] = QuestionLocale.objects.get(pk=criteria["locale"])
+        if criteria.get("contest"):
+            criteria["contest"] = Contest.objects.get(pk=criteria["contest"])
+
+        pool_key = Quizz.pool_key_for(
+            criteria["questions_count"],
+            criteria.get("locale"),
+            criteria.get("contest"),
+            criteria.get("difficulty", 0),
+            criteria.get("types_mix"),
+        )
+
+        missing = size - Quizz.objects.filter(pool_key=pool_key).count()
+        generated = 0
+
+        for _ in range(missing):
+            criteria.setdefault("difficulty", 0)
+            if not Quizz.generate_quizz(user=None, pooled=True, **criteria):
+                break
+            generated += 1
+
+        if generated:
+            self.stdout.write(f"{generated} quizzes generated for {pool_key}.")
@@ -0,0 +1,39 @@
+from django.core.management import BaseCommand
+
+from quizz.models import Quizz
+
+
+class Command(BaseCommand):
+    help = (
+        "Computes again the totals stored on quizzes (points, answers counts…) "
+        "from their questions. Run it once to populate the quizzes created "
+        "before these totals existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="How many quizzes to update at once.",
+        )
+
+    def handle(self, *args, chunk_size, **options):
+        refreshed = 0
+        last_pk = 0
+
+        while True:
+            chunk = list(
+                Quizz.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:chunk_size]
+            )
+
+            if not chunk:
+                break
+
+            last_pk = chunk[-1]
+            Quizz.refresh_totals(chunk)
+            refreshed += len(chunk)
+
+        self.stdout.write(f"Totals of {refreshed} quizzes refreshed.")
@@ -0,0 +1,220 @@
+from collections import defaultdict
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from quizz.grading import grade_linked, grade_mcq, grade_open
+from quizz.models import Question, Quizz, QuizzQuestion, QUESTION_MCQ, QUESTION_OPEN
+
+
+class Command(BaseCommand):
+    help = (
+        "Grades again the answered questions with the current answers keys "
+        "(e.g. after fixing a wrong answer), and updates the points and "
+        "success of the answers whose grade changed, and the totals of their "
+        "quizzes. Answers replaced in the questions editor are matched to the "
+        "current ones by their text; answers removed since keep their original "
+        "key."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--question",
+            type=int,
+            action="append",
+            dest="questions",
+            help="Only re-grade the answers to this question (can be repeated).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="How many answers to load and update at once.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the answers whose grade would change.",
+        )
+
+    def handle(self, *args, questions, chunk_size, dry_run, **options):
+        answered = QuizzQuestion.objects.filter(finished_at__isnull=False)
+        if questions:
+            answered = answered.filter(question_id__in=questions)
+
+        self.questions = {}
+        self.keys = {}
+
+        examined = 0
+        changed = 0
+        last_pk = 0
+
+        # Answers are streamed by chunks, following the primary keys, so memory
+        # stays bounded whatever the amount of answers.
+        while True:
+            chunk = list(
+                answered.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", "question_id", "open_answer", "points", "success")[
+                    :chunk_size
+                ]
+            )
+
+            if not chunk:
+                break
+
+            last_pk = chunk[-1][0]
+            updates = self.rescore(chunk)
+
+            if updates and not dry_run:
+                with transaction.atomic():
+                    QuizzQuestion.objects.bulk_update(updates, ["points", "success"])
+                    Quizz.refresh_totals(
+                        Quizz.objects.filter(
+                            questions__in=[update.pk for update in updates]
+                        )
+                        .values_list("pk", flat=True)
+                        .distinct()
+                    )
+
+            examined += len(chunk)
+            changed += len(updates)
+
+        self.stdout.write(
+            f"{changed} of {examined} answers "
+            + ("would be re-graded." if dry_run else "re-graded.")
+        )
+
+    def load_questions(self, questions_pks):
+        """
+        Loads the grading data of the questions not already known, and their
+        current answers keys.
+
+        :param questions_pks: The primary keys of the needed questions.
+        """
+        missing = set(questions_pks) - self.questions.keys()
+        if not missing:
+            return
+
+        self.questions.update(
+            {
+                pk: (question_type, difficulty, has_open_choice, open_valid_answer)
+                for pk, question_type, difficulty, has_open_choice, open_valid_answer in (
+                    Question.objects.filter(pk__in=missing).values_list(
+                        "pk",
+                        "type",
+                        "difficulty",
+                        "has_open_choice",
+                        "open_valid_answer_normalized",
+                    )
+                )
+            }
+        )
+
+        # The editor replaces all the answers of a question when one of them
+        # is fixed, so answers are also known by their text, to find the
+        # current key of the replaced ones.
+        current_answers = Question.answers.through.objects.filter(
+            question_id__in=missing, answer__is_deleted=False
+        ).values_list(
+            "question_id",
+            "answer__answer",
+            "answer__is_correct",
+            "answer__linked_answer__answer",
+        )
+
+        self.keys.update({pk: {} for pk in missing})
+        for question_pk, answer, is_correct, linked_answer in current_answers:
+            self.keys[question_pk][answer] = (is_correct, linked_answer)
+
+    def rescore(self, chunk):
+        """
+        Grades again a chunk of answers.
+
+        :param chunk: A list of (pk, question_id, open_answer, points, success)
+                      tuples.
+        :return: A list of QuizzQuestion instances, with only their primary
+                 key, points and success set, for the answers whose grade
+                 changed.
+        """
+        self.load_questions(question_pk for _, question_pk, *_ in chunk)
+
+        # All the user's answers to MCQ and linked questions of this chunk are
+        # loaded at once, with their answers keys.
+        rows = QuizzQuestion.answers.through.objects.filter(
+            quizzquestion_id__in=[
+                pk
+                for pk, question_pk, *_ in chunk
+                if self.questions[question_pk][0] != QUESTION_OPEN
+            ]
+        ).values_list(
+            "quizzquestion_id",
+            "quizzquestion__question_id",
+            "quizzanswer__proposed_answer_id",
+            "quizzanswer__proposed_answer__answer",
+            "quizzanswer__proposed_answer__is_deleted",
+            "quizzanswer__proposed_answer__is_correct",
+            "quizzanswer__proposed_answer__linked_answer_id",
+            "quizzanswer__proposed_answer__linked_answer__answer",
+            "quizzanswer__is_checked",
+            "quizzanswer__linked_to_id",
+            "quizzanswer__linked_to__answer",
+        )
+
+        # For each user's answer: its proposed answer, whether it should be
+        # checked, whether it was, and the answer it should be linked to and
+        # the one it was linked to (by primary key, or by text if the proposed
+        # answer was replaced since).
+        user_answers = defaultdict(list)
+        for (
+            quizz_question_pk,
+            question_pk,
+            proposed,
+            text,
+            is_deleted,
+            is_correct,
+            linked_answer,
+            linked_answer_text,
+            is_checked,
+            linked_to,
+            linked_to_text,
+        ) in rows:
+            if is_deleted and text in self.keys[question_pk]:
+                is_correct, linked_answer = self.keys[question_pk][text]
+                linked_to = linked_to_text
+            elif is_deleted:
+                linked_answer, linked_to = linked_answer_text, linked_to_text
+
+            user_answers[quizz_question_pk].append(
+                (proposed, is_correct, is_checked, linked_answer, linked_to)
+            )
+
+        updates = []
+
+        for pk, question_pk, open_answer, points, success in chunk:
+            question = self.questions[question_pk]
+            question_type, difficulty, has_open_choice, open_valid_answer = question
+            answers = user_answers[pk]
+
+            if question_type == QUESTION_OPEN:
+                grade = grade_open(difficulty, open_valid_answer, open_answer)
+            elif question_type == QUESTION_MCQ:
+                grade = grade_mcq(
+                    difficulty,
+                    [(proposed, is_correct) for proposed, is_correct, *_ in answers],
+                    {proposed for proposed, _, is_checked, *_ in answers if is_checked},
+                    has_open_choice=has_open_choice,
+                    open_valid_answer=open_valid_answer,
+                    open_answer=open_answer,
+                )
+            else:
+                grade = grade_linked(
+                    difficulty,
+                    {proposed: linked for proposed, _, _, linked, _ in answers},
+                    {proposed: linked_to for proposed, *_, linked_to in answers},
+                )
+
+            if grade != (points, success):
+                updates.append(QuizzQuestion(pk=pk, points=grade[0], success=grade[1]))
+
+        return updates
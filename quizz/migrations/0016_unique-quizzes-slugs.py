@@ -0,0 +1,49 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:55
+
+import random
+import string
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def deduplicate_slugs(apps, schema_editor):
+    """
+    Slugs were checked before insertion but not unique-indexed, so concurrent
+    quizzes creations could have used the same slug. We regenerate the slugs
+    of all but the first quizz for each duplicated slug.
+    """
+    Quizz = apps.get_model("quizz", "Quizz")
+
+    duplicated = (
+        Quizz.objects.values("slug")
+        .annotate(count=Count("pk"))
+        .filter(count__gt=1)
+        .values_list("slug", flat=True)
+    )
+
+    for slug in duplicated:
+        for quizz in Quizz.objects.filter(slug=slug).order_by("pk")[1:]:
+            new_slug = None
+            while new_slug is None or Quizz.objects.filter(slug=new_slug).exists():
+                new_slug = "".join(
+                    random.choices(string.ascii_lowercase + string.digits, k=8)
+                )
+            quizz.slug = new_slug
+            quizz.save(update_fields=["slug"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizz', '0015_re-labelled-questions-creation-and-update-fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='quizz',
+            name='slug',
+            field=models.SlugField(max_length=8, unique=True, verbose_name="The quizz' slug"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizz', '0016_unique-quizzes-slugs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizz',
+            name='pool_key',
+            field=models.CharField(blank=True, db_index=True, default=None, editable=False, max_length=64, null=True, verbose_name='The criteria of this quizz, if not claimed yet'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:59
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def collect_seen_questions(apps, schema_editor):
+    """
+    Builds the seen questions bitmaps from the answers users already gave.
+    """
+    Profile = apps.get_model("quizz", "Profile")
+    QuizzQuestion = apps.get_model("quizz", "QuizzQuestion")
+
+    seen = defaultdict(bytearray)
+    for user_pk, question_pk in (
+        QuizzQuestion.objects.filter(
+            finished_at__isnull=False, quizz__user__isnull=False
+        )
+        .values_list("quizz__user_id", "question_id")
+        .iterator()
+    ):
+        bitmap = seen[user_pk]
+        index = question_pk >> 3
+        if index >= len(bitmap):
+            bitmap.extend(bytes(index - len(bitmap) + 1))
+        bitmap[index] |= 1 << (question_pk & 7)
+
+    for user_pk, bitmap in seen.items():
+        Profile.objects.filter(user_id=user_pk).update(seen_questions=bytes(bitmap))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizz', '0017_quizzes-warm-pool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='seen_questions',
+            field=models.BinaryField(default=b'', verbose_name='Questions answered by the user'),
+        ),
+        migrations.RunPython(collect_seen_questions, migrations.RunPython.noop),
+    ]
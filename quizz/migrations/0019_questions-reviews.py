@@ -0,0 +1,73 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import quizz.models
+from quizz.models.stats import schedule_review
+
+
+def collect_reviews(apps, schema_editor):
+    """
+    Plans the questions reviews from the answers users already gave.
+    """
+    QuestionReview = apps.get_model("quizz", "QuestionReview")
+    QuizzQuestion = apps.get_model("quizz", "QuizzQuestion")
+
+    reviews = {}
+    for user_pk, question_pk, success, finished_at in (
+        QuizzQuestion.objects.filter(
+            finished_at__isnull=False,
+            success__isnull=False,
+            quizz__user__isnull=False,
+        )
+        .order_by("finished_at")
+        .values_list("quizz__user_id", "question_id", "success", "finished_at")
+        .iterator()
+    ):
+        review = reviews.get((user_pk, question_pk))
+        streak, next_review_at = schedule_review(
+            success, review.streak if review else 0, finished_at
+        )
+        reviews[(user_pk, question_pk)] = QuestionReview(
+            user_id=user_pk,
+            question_id=question_pk,
+            last_success=success,
+            streak=streak,
+            last_answered_at=finished_at,
+            next_review_at=next_review_at,
+        )
+
+    QuestionReview.objects.bulk_create(reviews.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quizz', '0018_users-seen-questions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionReview',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_success', models.CharField(choices=[('PERFECT', quizz.models.QuestionSuccess['PERFECT']), ('ALMOST', quizz.models.QuestionSuccess['ALMOST']), ('FAILED', quizz.models.QuestionSuccess['FAILED'])], max_length=8, verbose_name='Was the question correctly answered the last time?')),
+                ('streak', models.PositiveSmallIntegerField(default=0, verbose_name='Consecutive perfect answers')),
+                ('last_answered_at', models.DateTimeField(verbose_name='The moment when the question was last answered')),
+                ('next_review_at', models.DateTimeField(verbose_name='The moment when the question should be reviewed')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='quizz.question', verbose_name='The question')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='questions_reviews', to=settings.AUTH_USER_MODEL, verbose_name='The user')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='questionreview',
+            index=models.Index(fields=['user', 'next_review_at'], name='quizz_quest_user_id_40e9b5_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='questionreview',
+            unique_together={('user', 'question')},
+        ),
+        migrations.RunPython(collect_reviews, migrations.RunPython.noop),
+    ]
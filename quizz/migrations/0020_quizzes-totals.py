@@ -0,0 +1,48 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizz', '0019_questions-reviews'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizz',
+            name='almost_answers',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Almost correct answers count'),
+        ),
+        migrations.AddField(
+            model_name='quizz',
+            name='failed_answers',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Failed answers count'),
+        ),
+        migrations.AddField(
+            model_name='quizz',
+            name='finished_questions_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Answered questions count'),
+        ),
+        migrations.AddField(
+            model_name='quizz',
+            name='max_points',
+            field=models.FloatField(default=0, editable=False, verbose_name='The maximal amount of points'),
+        ),
+        migrations.AddField(
+            model_name='quizz',
+            name='perfect_answers',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Perfect answers count'),
+        ),
+        migrations.AddField(
+            model_name='quizz',
+            name='questions_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Questions count'),
+        ),
+        migrations.AddField(
+            model_name='quizz',
+            name='user_points',
+            field=models.FloatField(default=0, editable=False, verbose_name='The points earned by the user'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:20
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def collect_statistics(apps, schema_editor):
+    """
+    Counts the existing questions, users and quizzes, globally and by day.
+    """
+    Statistics = apps.get_model("quizz", "Statistics")
+    DailyStatistics = apps.get_model("quizz", "DailyStatistics")
+    Question = apps.get_model("quizz", "Question")
+    Quizz = apps.get_model("quizz", "Quizz")
+    User = apps.get_model("auth", "User")
+
+    started_quizzes = Quizz.objects.filter(pool_key__isnull=True)
+
+    Statistics.objects.create(
+        questions=Question.objects.count(),
+        users=User.objects.count(),
+        anonymous=started_quizzes.filter(user__isnull=True)
+        .values("ip")
+        .distinct()
+        .count(),
+        quizzes=started_quizzes.filter(finished_at__isnull=False).count(),
+        started_quizzes=started_quizzes.count(),
+        users_quizzes=started_quizzes.filter(user__isnull=False).count(),
+        started_quizzes_questions=started_quizzes.aggregate(
+            questions=models.Count("questions")
+        )["questions"],
+    )
+
+    days = defaultdict(dict)
+    for counter, queryset, field in (
+        ("users", User.objects.all(), "date_joined"),
+        ("started_quizzes", started_quizzes, "started_at"),
+        ("quizzes", started_quizzes.filter(finished_at__isnull=False), "finished_at"),
+    ):
+        for row in (
+            queryset.annotate(day=TruncDate(field))
+            .values("day")
+            .annotate(count=models.Count("pk"))
+            .order_by()
+        ):
+            days[row["day"]][counter] = row["count"]
+
+    DailyStatistics.objects.bulk_create(
+        [DailyStatistics(date=day, **counters) for day, counters in days.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizz', '0020_quizzes-totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStatistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Day')),
+                ('users', models.PositiveIntegerField(default=0, verbose_name='New users')),
+                ('started_quizzes', models.PositiveIntegerField(default=0, verbose_name='Started quizzes')),
+                ('quizzes', models.PositiveIntegerField(default=0, verbose_name='Finished quizzes')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='Statistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('questions', models.PositiveIntegerField(default=0, verbose_name='Questions')),
+                ('users', models.PositiveIntegerField(default=0, verbose_name='Users')),
+                ('anonymous', models.PositiveIntegerField(default=0, verbose_name='Anonymous users')),
+                ('quizzes', models.PositiveIntegerField(default=0, verbose_name='Finished quizzes')),
+                ('started_quizzes', models.PositiveIntegerField(default=0, verbose_name='Started quizzes')),
+                ('users_quizzes', models.PositiveIntegerField(default=0, verbose_name='Quizzes started by registered users')),
+                ('started_quizzes_questions', models.PositiveIntegerField(default=0, verbose_name='Questions in started quizzes')),
+            ],
+            options={
+                'verbose_name_plural': 'Statistics',
+            },
+        ),
+        migrations.AlterField(
+            model_name='quizz',
+            name='ip',
+            field=models.GenericIPAddressField(blank=True, db_index=True, editable=False, null=True, verbose_name='The IP address of the user passing this quizz'),
+        ),
+        migrations.RunPython(collect_statistics, migrations.RunPython.noop),
+    ]
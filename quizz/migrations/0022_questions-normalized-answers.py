@@ -0,0 +1,39 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:22
+
+from django.db import migrations, models
+from quizz.text_processors import normalize
+
+
+def normalize_valid_answers(apps, schema_editor):
+    """
+    Normalizes the open valid answers of the existing questions.
+    """
+    Question = apps.get_model("quizz", "Question")
+
+    questions = list(
+        Question.objects.filter(open_valid_answer__isnull=False).only(
+            "pk", "open_valid_answer"
+        )
+    )
+    for question in questions:
+        question.open_valid_answer_normalized = normalize(question.open_valid_answer)
+
+    Question.objects.bulk_update(
+        questions, ["open_valid_answer_normalized"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizz', '0021_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='open_valid_answer_normalized',
+            field=models.CharField(blank=True, default=None, editable=False, max_length=1024, null=True, verbose_name='Normalized valid answer'),
+        ),
+        migrations.RunPython(normalize_valid_answers, migrations.RunPython.noop),
+    ]
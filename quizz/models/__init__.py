@@ -1,5 +1,6 @@
 from django.utils.translation import gettext_lazy as _
-from enum import Enum
+
+from quizz.constants import QuestionSuccess  # noqa
 
 QUESTION_OPEN = "OPEN"
 QUESTION_MCQ = "MCQ"
@@ -11,18 +12,7 @@ QUESTION_TYPES = (
 )
 
 
-class QuestionSuccess(Enum):
-    """
-    For MCQ and linked answers, the success status will always be
-    PERFECT or FAILED. For open answers, if the text entered is very
-    close to the valid answer, we'll grant an ALMOST.
-    """
-
-    PERFECT = "PERFECT"
-    ALMOST = "ALMOST"
-    FAILED = "FAILED"
-
-
 from .users import *  # noqa
 from .questions import *  # noqa
+from .stats import *  # noqa
 from .quizzes import *  # noqa
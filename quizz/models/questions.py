@@ -1,3 +1,7 @@
+import threading
+import time
+from collections import namedtuple
+
 from django.core.cache import cache
 from django.dispatch import receiver
 from os.path import splitext
@@ -6,6 +10,7 @@ from hashlib import sha256
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from mptt.models import MPTTModel, TreeForeignKey, TreeManyToManyField
@@ -18,6 +23,7 @@ from quizz.forms.quizzes import (
     LinkedQuestionForm,
 )
 from quizz.models import QUESTION_OPEN, QUESTION_MCQ, QUESTION_LINKED, QUESTION_TYPES
+from quizz.text_processors import normalize
 
 
 def quizz_illustration_path(instance, filename):
@@ -91,6 +97,79 @@ class Tag(MPTTModel):
         order_insertion_by = ["name"]
 
 
+class TagsClosure:
+    """
+    The ancestors and descendants of every tag, by primary key, so that
+    tags hierarchies can be expanded without one query per tag.
+
+    The closure is built from the tags tree, then kept in this process. It's
+    rebuilt when tags are saved or deleted by this process, and at most
+    `MAX_AGE` seconds after being built, to catch up with changes made by
+    other processes: tags are few, so rebuilding it is a single small query.
+    """
+
+    MAX_AGE = 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._ancestors = {}
+        self._descendants = {}
+
+    def _build(self):
+        self._built_at = time.monotonic()
+        parents = dict(Tag.objects.values_list("pk", "parent_id"))
+
+        ancestors = {}
+        descendants = {pk: set() for pk in parents}
+
+        for pk in parents:
+            tag_ancestors = []
+            parent = parents[pk]
+            while parent is not None and parent not in tag_ancestors:
+                tag_ancestors.append(parent)
+                descendants[parent].add(pk)
+                parent = parents.get(parent)
+            ancestors[pk] = frozenset(tag_ancestors)
+
+        self._ancestors = ancestors
+        self._descendants = {pk: frozenset(pks) for pk, pks in descendants.items()}
+
+    def _ensure_fresh(self):
+        with self._lock:
+            if (
+                self._built_at is None
+                or time.monotonic() - self._built_at > self.MAX_AGE
+            ):
+                self._build()
+
+    def invalidate(self):
+        """
+        Marks the closure as outdated. It will be rebuilt on next use.
+        """
+        self._built_at = None
+
+    def ancestors(self, pk):
+        """
+        :param pk: A tag's primary key.
+        :return: A frozenset with the primary keys of all the tag's ancestors.
+        """
+        self._ensure_fresh()
+        return self._ancestors.get(pk, frozenset())
+
+    def descendants(self, pk):
+        """
+        :param pk: A tag's primary key.
+        :return: A frozenset with the primary keys of all the tag's descendants.
+        """
+        self._ensure_fresh()
+        return self._descendants.get(pk, frozenset())
+
+
+"""The tags closure of this process."""
+tags_closure = TagsClosure()
+
+
 class Answer(models.Model):
     """
     An answer to a question. Questions can either be multiple-choice,
@@ -260,6 +339,19 @@ class Question(models.Model):
         max_length=1024,
     )
 
+    """
+    The open valid answer, normalized (see `text_processors.normalize`), so
+    answers are graded without normalizing it each time. Updated on save.
+    """
+    open_valid_answer_normalized = models.CharField(
+        verbose_name=_("Normalized valid answer"),
+        blank=True,
+        null=True,
+        default=None,
+        max_length=1024,
+        editable=False,
+    )
+
     """In the correction phase, will allow to display an extra explanation."""
     answer_comment = models.TextField(
         verbose_name=_("Answer's comment"), max_length=2 ** 16, blank=True, null=True
@@ -268,6 +360,20 @@ class Question(models.Model):
     def __str__(self):
         return f"{self.question} ({self.verbose_type})"
 
+    def save(self, *args, **kwargs):
+        """Persists a question, normalizing its open valid answer."""
+        self.open_valid_answer_normalized = (
+            normalize(self.open_valid_answer)
+            if self.open_valid_answer is not None
+            else None
+        )
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "open_valid_answer" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "open_valid_answer_normalized"}
+
+        super(Question, self).save(*args, **kwargs)
+
     @property
     def verbose_type(self):
         for question_type, verbose in QUESTION_TYPES:
@@ -287,6 +393,16 @@ class Question(models.Model):
     def is_linked(self):
         return self.type == QUESTION_LINKED
 
+    @cached_property
+    def snapshot(self):
+        """
+        Returns what's needed to display this question and grade the answers
+        to it, cached until the question or its answers are updated.
+
+        :return: A QuestionSnapshot instance.
+        """
+        return QuestionSnapshot.of(self)
+
     def _selectable_answers(self, with_pk=False):
         """
         Returns the selectable answers of this question.
@@ -307,20 +423,32 @@ class Question(models.Model):
         elif self.type == "LINKED":
             if with_pk:
                 return [
-                    (
-                        (answer.pk, answer.answer),
-                        (answer.linked_answer.pk, answer.linked_answer.answer),
-                    )
-                    for answer in self.answers.filter(is_deleted=False)
-                    if answer.answer and answer.linked_answer.answer
+                    ((answer.pk, answer.answer), (linked.pk, linked.answer))
+                    for answer, linked in self.selectable_linked_answers
                 ]
             else:
                 return [
-                    (answer.answer, answer.linked_answer.answer)
-                    for answer in self.answers.filter(is_deleted=False)
-                    if answer.answer and answer.linked_answer.answer
+                    (answer.answer, linked.answer)
+                    for answer, linked in self.selectable_linked_answers
                 ]
 
+    @property
+    def selectable_linked_answers(self):
+        """
+        For linked questions, returns the selectable answers as a list of
+        (answer, linked answer) tuples of Answer instances, all loaded in a
+        single query.
+
+        :return: The answers.
+        """
+        return [
+            (answer, answer.linked_answer)
+            for answer in self.answers.filter(is_deleted=False).select_related(
+                "linked_answer"
+            )
+            if answer.answer and answer.linked_answer.answer
+        ]
+
     selectable_answers = property(
         _selectable_answers,
         doc="""
@@ -384,28 +512,25 @@ class Question(models.Model):
         :return: A dictionary {tag_pk: (tag, number of children omitted)}
         """
         tags = self.tags.all()
+        tags_pks = {tag.pk for tag in tags}
         reduced = {tag.pk: (tag, 1) for tag in tags}
 
         tag: Tag
         for tag in tags:
-            if tag.is_leaf_node():
+            descendants = tags_closure.descendants(tag.pk)
+            if not descendants:
                 continue
 
-            descendants = tag.get_descendants()
-            all_in = True
-            for child in descendants:
-                all_in &= child in tags
-
-            if all_in:
-                reduced[tag.pk] = tag, tag.get_descendant_count()
-                for child in tag.get_descendants():
-                    if child.pk in reduced:
-                        del reduced[child.pk]
+            if descendants <= tags_pks:
+                reduced[tag.pk] = tag, len(descendants)
+                for child_pk in descendants:
+                    if child_pk in reduced:
+                        del reduced[child_pk]
 
         for tag, children_removed in reduced.copy().values():
-            for parent in tag.get_ancestors():
-                if parent in tags and parent.pk in reduced:
-                    del reduced[parent.pk]
+            for parent_pk in tags_closure.ancestors(tag.pk):
+                if parent_pk in reduced:
+                    del reduced[parent_pk]
 
         return reduced
 
@@ -910,6 +1035,158 @@ class Question(models.Model):
             return Question.create_linked(*args, **kwargs)
 
 
-@receiver([models.signals.post_save, models.signals.post_delete], sender=Question)
-def clear_overview_cache_when_quizz_is_finished(sender, instance, **kwargs):
-    cache.delete("overview-statistics")
+class QuestionSnapshot(
+    namedtuple(
+        "QuestionSnapshot",
+        (
+            "pk",
+            "type",
+            "question",
+            "difficulty",
+            "has_open_choice",
+            "open_valid_answer",
+            "open_valid_answer_normalized",
+            "illustration",
+            "choices",
+            "pairs",
+        ),
+    )
+):
+    """
+    An immutable copy of a question, with everything needed to display it and
+    grade the answers to it, without touching the database:
+
+    - `illustration` is the URL of the illustration's thumbnail (or None);
+    - `choices`, for MCQ, is a tuple of (pk, answer, is_correct) tuples;
+    - `pairs`, for linked questions, is a tuple of ((pk, answer), (pk,
+      answer)) tuples of answers linked together.
+
+    Snapshots are cached by question and last update date, so updating a
+    question implicitly invalidates it; as answers can be updated separately,
+    their updates invalidate the snapshots explicitly.
+    """
+
+    CACHE_TIMEOUT = 24 * 3600
+
+    @staticmethod
+    def cache_key(pk, updated_at):
+        return f"question-snapshot:v2:{pk}:{updated_at.timestamp()}"
+
+    @staticmethod
+    def build(question):
+        """
+        Builds the snapshot of a question from the database.
+
+        :param question: The question.
+        :return: The snapshot.
+        """
+        choices = ()
+        pairs = ()
+
+        if question.is_mcq:
+            choices = tuple(
+                (answer.pk, answer.answer, answer.is_correct)
+                for answer in question.selectable_answers
+            )
+        elif question.is_linked:
+            pairs = tuple(question.selectable_answers_with_pk)
+
+        return QuestionSnapshot(
+            pk=question.pk,
+            type=question.type,
+            question=question.question,
+            difficulty=question.difficulty,
+            has_open_choice=question.has_open_choice,
+            open_valid_answer=question.open_valid_answer,
+            open_valid_answer_normalized=question.open_valid_answer_normalized,
+            illustration=(
+                question.illustration.thumbnail["600x600"].url
+                if question.illustration
+                else None
+            ),
+            choices=choices,
+            pairs=pairs,
+        )
+
+    @staticmethod
+    def of(question):
+        """
+        Returns the snapshot of a question, from the cache if possible.
+
+        :param question: The question.
+        :return: The snapshot.
+        """
+        key = QuestionSnapshot.cache_key(question.pk, question.updated_at)
+        snapshot = cache.get(key)
+
+        if snapshot is None:
+            snapshot = QuestionSnapshot.build(question)
+            cache.set(key, snapshot, timeout=QuestionSnapshot.CACHE_TIMEOUT)
+
+        return snapshot
+
+    @staticmethod
+    def prefetch(questions):
+        """
+        Loads the snapshots of several questions with a single cache lookup,
+        and attaches them to the questions instances (see `Question.snapshot`).
+
+        :param questions: An iterable of questions.
+        """
+        questions = {
+            QuestionSnapshot.cache_key(question.pk, question.updated_at): question
+            for question in questions
+        }
+        snapshots = cache.get_many(questions.keys())
+
+        missing = {}
+        for key, question in questions.items():
+            if key not in snapshots:
+                snapshots[key] = missing[key] = QuestionSnapshot.build(question)
+            question.__dict__["snapshot"] = snapshots[key]
+
+        if missing:
+            cache.set_many(missing, timeout=QuestionSnapshot.CACHE_TIMEOUT)
+
+    @staticmethod
+    def invalidate(questions):
+        """
+        Removes the cached snapshots of the given questions.
+
+        :param questions: A queryset of questions.
+        """
+        cache.delete_many(
+            [
+                QuestionSnapshot.cache_key(pk, updated_at)
+                for pk, updated_at in questions.values_list("pk", "updated_at")
+            ]
+        )
+
+
+@receiver([models.signals.post_save, models.signals.post_delete], sender=Tag)
+def invalidate_tags_closure_when_tag_is_updated(sender, instance, **kwargs):
+    tags_closure.invalidate()
+
+
+@receiver(models.signals.post_save, sender=Answer)
+def invalidate_questions_snapshots_when_answer_is_updated(sender, instance, **kwargs):
+    QuestionSnapshot.invalidate(
+        Question.objects.filter(
+            models.Q(answers=instance) | models.Q(answers__linked_answer=instance)
+        )
+    )
+
+
+@receiver(models.signals.m2m_changed, sender=Question.answers.through)
+def invalidate_questions_snapshots_when_answers_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:
+        questions = Question.objects.filter(pk__in=pk_set or ())
+    else:
+        questions = Question.objects.filter(pk=instance.pk)
+
+    QuestionSnapshot.invalidate(questions)
@@ -1,10 +1,13 @@
 import random
 import string
+from datetime import timedelta
+
 from django.contrib.auth.models import User
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Sum
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, Prefetch, Q, Sum
+from django.db.models.functions import Coalesce
 from django.dispatch import receiver
 from django.utils.functional import cached_property
 from django.utils import timezone
@@ -15,10 +18,47 @@ from quizz.forms.quizzes import (
     MultipleChoicesQuestionForm,
     LinkedQuestionForm,
 )
-from quizz.models import QuestionSuccess
-from quizz.models.questions import Question, Answer
-from quizz.text_processors import gentle_levenshtein_distance
-from quizz.utils import as_choices
+from quizz.models import QuestionSuccess, QUESTION_MCQ
+from quizz.models.questions import Question, QuestionSnapshot, Answer, tags_closure
+from quizz.models.stats import QuestionReview, Statistics
+from quizz.models.users import Profile
+from quizz.grading import grade_linked, grade_mcq, grade_open
+from quizz.pools import question_pool
+from quizz.sampling import allocate, difficulty_weight, weighted_sample
+from quizz.utils import as_choices, bulk_create
+
+
+"""The maximal amount of slugs tried before giving up saving a new quizz."""
+SLUG_ALLOCATION_ATTEMPTS = 10
+
+"""The quizz' counter of answers for each success."""
+SUCCESS_COUNTERS = {
+    QuestionSuccess.PERFECT.value: "perfect_answers",
+    QuestionSuccess.ALMOST.value: "almost_answers",
+    QuestionSuccess.FAILED.value: "failed_answers",
+}
+
+"""The types of the questions in a quizz, if not specified."""
+DEFAULT_TYPES_MIX = {QUESTION_MCQ: 100}
+
+"""How long the summary of the ongoing quizzes of an user is cached."""
+ONGOING_QUIZZES_CACHE_TIMEOUT = 24 * 3600
+
+"""
+The cache key of the version of the quizzes reports, part of the cache keys of
+the rendered reports. Bumping it invalidates all of them at once.
+"""
+REPORTS_VERSION_CACHE_KEY = "quizz-reports-version"
+
+
+def generate_slug(length):
+    """
+    Generates a random slug for a quizz.
+
+    :param length: The slug's length.
+    :return: The slug, made of lowercase ASCII letters and digits.
+    """
+    return "".join(random.choices(string.ascii_lowercase + string.digits, k=length))
 
 
 class QuizzAnswer(models.Model):
@@ -187,21 +227,27 @@ class QuizzQuestion(models.Model):
         """
         return self.question.form_class(question=self.question)
 
-    def register_answer(self, data):
+    def grade(self, data):
         """
         From the given POST data (generated by the question's form), analyses
-        the answers and stores them alongside success and points.
+        the answers and sets the success and points, without saving anything.
 
         :param data: The POST data generated by this question's form.
-        :return: True if the answer was correctly saved; False else. (Unrelated
-                 to the fact the answer is actually correct.)
+        :return: The user's answers to save (for MCQ and linked questions), as
+                 a list of unsaved QuizzAnswer instances; or None if the data
+                 is not valid.
         """
         form = self.question.form_class(data=data, question=self.question)
 
         if not form.is_valid():
-            return False
+            return None
 
         self.finished_at = timezone.now()
+        user_answers = []
+
+        # Questions are graded from their snapshot, so no answer is loaded
+        # from the database here. See `quizz.grading` for the scoring rules.
+        question = self.question.snapshot
 
         if self.question.is_open:
             form: OpenQuestionForm = form
@@ -211,172 +257,138 @@ class QuizzQuestion(models.Model):
             # spaces, punctuation, etc.), we give more or less points.
 
             self.open_answer = form.cleaned_data["answer"]
-
-            distance = gentle_levenshtein_distance(
-                self.question.open_valid_answer, self.open_answer
+            self.points, self.success = grade_open(
+                question.difficulty,
+                question.open_valid_answer_normalized,
+                self.open_answer,
             )
 
-            if distance == 0:
-                self.points = self.question.difficulty
-                self.success = QuestionSuccess.PERFECT.value
-            elif distance < 4:
-                self.points = float(self.question.difficulty) / 2.0
-                self.success = QuestionSuccess.ALMOST.value
-            else:
-                self.points = 0
-                self.success = QuestionSuccess.FAILED.value
-
         elif self.question.is_mcq:
             form: MultipleChoicesQuestionForm = form
 
-            # For MCQ, points are awarded in proportion to the correctly ticked
-            # answers, with a penalty if incorrect answers are ticked, to
-            # penalize those who would seek to maximize their points by
-            # systematically tick all answers. In the case of an open answer,
-            # it reports such an exact point, half a point if it is close, and
-            # none otherwise.
-
-            answers = self.question.selectable_answers
-            correct_answers = len([1 for answer in answers if answer.is_correct])
-
-            user_answers = []
-            correct_user_answers = 0
-            wrong_user_answers_checked = 0
-
-            open_answer_points = 0.0
-            open_answer_count = 0.0
-
-            if self.question.has_open_choice:
-                open_answer_count = 1
-                open_answer = (
-                    form.cleaned_data["other_answer"]
-                    if "other_answer" in form.cleaned_data
-                    else None
-                )
-
-                # If the open answer should be left blank and the user entered
-                # something, we don't consider this as an almost-good answer
-                # with less than 4 characters (that what the distance would
-                # yield). Instead, the answer is immediately considered wrong.
-                if not self.question.open_valid_answer.strip() and open_answer.strip():
-                    open_answer_points = 0
-
-                else:
-                    distance = gentle_levenshtein_distance(
-                        self.question.open_valid_answer, open_answer
-                    )
-
-                    if distance == 0:
-                        open_answer_points = 1.0
-                    elif distance < 4:
-                        open_answer_points = 0.5
-                    else:
-                        open_answer_points = 0.0
+            checked = {int(pk) for pk in form.cleaned_data["answers"]}
 
+            open_answer = None
+            if question.has_open_choice:
+                open_answer = form.cleaned_data.get("other_answer")
                 if open_answer:
                     self.open_answer = open_answer
 
-            for answer in answers:
-                user_checked = str(answer.pk) in form.cleaned_data["answers"]
-                if user_checked == answer.is_correct and user_checked:
-                    correct_user_answers += 1
-                elif user_checked and not answer.is_correct:
-                    wrong_user_answers_checked += 1
+            self.points, self.success = grade_mcq(
+                question.difficulty,
+                [(pk, is_correct) for pk, _answer, is_correct in question.choices],
+                checked,
+                has_open_choice=question.has_open_choice,
+                open_valid_answer=question.open_valid_answer_normalized,
+                open_answer=open_answer,
+            )
 
-                user_answer = QuizzAnswer(
-                    proposed_answer=answer, is_checked=user_checked, linked_to=None
+            user_answers = [
+                QuizzAnswer(
+                    proposed_answer_id=pk, is_checked=pk in checked, linked_to=None
                 )
-                user_answer.save()
-                user_answers.append(user_answer)
-
-            # For questions with answers, we calculate normally the points.
-            # For questions without any valid checked answer, we give all
-            # the points if the question is left blank, and none else.
-            if correct_answers > 0:
-                self.points = max(
-                    self.question.difficulty
-                    * (
-                        float(
-                            correct_user_answers
-                            - wrong_user_answers_checked
-                            + open_answer_points
-                        )
-                        / float(correct_answers + open_answer_count)
-                    ),
-                    0,
-                )
-            elif (
-                correct_user_answers == 0
-                and wrong_user_answers_checked == 0
-                and (open_answer_count == 0 or open_answer_points > 0.99)
-            ):
-                self.points = self.question.difficulty
-            else:
-                self.points = 0
-
-            if (
-                (0 < correct_answers == correct_user_answers)
-                or wrong_user_answers_checked == 0
-            ) and (open_answer_count == 0 or open_answer_points > 0.99):
-                self.success = QuestionSuccess.PERFECT.value
-            elif (
-                correct_user_answers == correct_answers - 1 and correct_user_answers > 1
-            ) or (
-                open_answer_count == 1
-                and open_answer_points > 0.49
-                and self.open_answer
-            ):
-                self.success = QuestionSuccess.ALMOST.value
-            else:
-                self.success = QuestionSuccess.FAILED.value
-
-            self.answers.add(*user_answers)
+                for pk, _answer, _is_correct in question.choices
+            ]
 
         elif self.question.is_linked:
             form: LinkedQuestionForm = form
 
-            # For linked questions, we check if answers are linked to the good
-            # ones. Unlinked or badly-linked answers gives no points.
+            for (pk, _answer), _linked in question.pairs:
+                if str(pk) in form.cleaned_data:
+                    user_answers.append(
+                        QuizzAnswer(
+                            proposed_answer_id=pk,
+                            is_checked=None,
+                            linked_to_id=int(form.cleaned_data[str(pk)]),
+                        )
+                    )
+
+            self.points, self.success = grade_linked(
+                question.difficulty,
+                {answer[0]: linked[0] for answer, linked in question.pairs},
+                {
+                    user_answer.proposed_answer_id: user_answer.linked_to_id
+                    for user_answer in user_answers
+                },
+            )
 
-            answers = self.question.selectable_answers_with_pk
+        return user_answers
 
-            user_answers = []
-            correct_user_answers = 0
+    def register_answer(self, data, quizz=None):
+        """
+        From the given POST data (generated by the question's form), analyses
+        the answers and stores them alongside success and points.
 
-            for answer, linked in answers:
-                if str(answer[0]) not in form.cleaned_data:
-                    continue
+        :param data: The POST data generated by this question's form.
+        :param quizz: The quizz this question belongs to. If given, the
+                      question is recorded as seen by the quizz' user, and
+                      its review is planned for the adaptive mode.
+        :return: True if the answer was correctly saved; False else. (Unrelated
+                 to the fact the answer is actually correct.)
+        """
+        was_finished = self.is_finished
+        user_answers = self.grade(data)
 
-                user_linked = Answer.objects.get(pk=form.cleaned_data[str(answer[0])])
-                print(user_linked.pk, linked[0])
-                if linked[0] == user_linked.pk:
-                    correct_user_answers += 1
+        if user_answers is None:
+            return False
 
-                user_answer = QuizzAnswer(
-                    proposed_answer=Answer.objects.get(pk=answer[0]),
-                    is_checked=None,
-                    linked_to=user_linked,
+        # The user's answers (for MCQ and linked questions) are all inserted at
+        # once, and linked to this question at once. The quizz' totals are
+        # updated in the same transaction.
+        with transaction.atomic():
+            if user_answers:
+                self.answers.add(
+                    *bulk_create(QuizzAnswer, user_answers, link="quizzquestion")
                 )
-                user_answer.save()
-                user_answers.append(user_answer)
+            self.save()
 
-            self.points = self.question.difficulty * (
-                float(correct_user_answers) / len(answers)
-            )
+            quizzes = Quizz.objects.filter(questions=self)
 
-            if correct_user_answers == len(answers):
-                self.success = QuestionSuccess.PERFECT.value
-            elif correct_user_answers == len(answers) - 1 and correct_user_answers > 1:
-                self.success = QuestionSuccess.ALMOST.value
+            if was_finished:
+                Quizz.refresh_totals(quizzes.values_list("pk", flat=True))
             else:
-                self.success = QuestionSuccess.FAILED.value
+                Quizz.increment_totals(quizzes, [self], quizz=quizz)
 
-            self.answers.add(*user_answers)
+        if quizz is not None and quizz.user_id is not None:
+            Profile.mark_questions_seen(quizz.user_id, [self.question_id])
+            QuestionReview.record(quizz.user_id, self.question_id, self.success)
 
-        self.save()
         return True
 
 
+class QuizzProgress:
+    """
+    A snapshot of the progress of a quizz, built from all its questions, loaded
+    at once and in order.
+
+    Everything else (current question, totals…) is derived from these questions
+    in Python, so it stays right if a question is answered through this
+    snapshot, without querying the database again.
+    """
+
+    def __init__(self, questions):
+        self.questions = questions
+
+    @property
+    def current_question(self):
+        return next(
+            (question for question in self.questions if not question.is_finished),
+            None,
+        )
+
+    @property
+    def questions_total(self):
+        return len(self.questions)
+
+    @property
+    def questions_finished(self):
+        return sum(1 for question in self.questions if question.is_finished)
+
+    @property
+    def questions_left(self):
+        return self.questions_total - self.questions_finished
+
+
 class Quizz(models.Model):
     """
     This is a quizz passed by an user. When someone request a quizz, all
@@ -389,7 +401,9 @@ class Quizz(models.Model):
     there could not be any security for these, we don't use PKs to identify
     quizzes in the URL.
     """
-    slug = models.SlugField(verbose_name=_("The quizz' slug"), max_length=8)
+    slug = models.SlugField(
+        verbose_name=_("The quizz' slug"), max_length=8, unique=True
+    )
 
     """
     The user passing the quizz. It can be anonymous (and then, this field is set
@@ -418,6 +432,7 @@ class Quizz(models.Model):
         editable=False,
         null=True,
         blank=True,
+        db_index=True,
     )
 
     """
@@ -442,6 +457,21 @@ class Quizz(models.Model):
         default=None,
     )
 
+    """
+    Quizzes for the most common criteria are generated in advance, to be
+    claimed by users asking for them. Until claimed, such a quizz has no user
+    and this field contains the key of its criteria (see `pool_key_for`).
+    """
+    pool_key = models.CharField(
+        verbose_name=_("The criteria of this quizz, if not claimed yet"),
+        max_length=64,
+        null=True,
+        blank=True,
+        default=None,
+        editable=False,
+        db_index=True,
+    )
+
     """
     All the questions in this quizz. Their order is also in this related model.
     """
@@ -449,50 +479,203 @@ class Quizz(models.Model):
         QuizzQuestion, verbose_name=_("The questions in this quizz")
     )
 
+    # Totals
+    # These are maintained when questions are answered, so lists and reports
+    # never have to aggregate the questions of the quizzes.
+
+    """The amount of questions in this quizz."""
+    questions_count = models.PositiveSmallIntegerField(
+        verbose_name=_("Questions count"), default=0, editable=False
+    )
+
+    """The amount of questions answered so far."""
+    finished_questions_count = models.PositiveSmallIntegerField(
+        verbose_name=_("Answered questions count"), default=0, editable=False
+    )
+
+    """The points earned by the user so far."""
+    user_points = models.FloatField(
+        verbose_name=_("The points earned by the user"), default=0, editable=False
+    )
+
+    """The maximal amount of points, i.e. the sum of the questions' difficulties."""
+    max_points = models.FloatField(
+        verbose_name=_("The maximal amount of points"), default=0, editable=False
+    )
+
+    """The amount of questions perfectly answered."""
+    perfect_answers = models.PositiveSmallIntegerField(
+        verbose_name=_("Perfect answers count"), default=0, editable=False
+    )
+
+    """The amount of questions almost correctly answered."""
+    almost_answers = models.PositiveSmallIntegerField(
+        verbose_name=_("Almost correct answers count"), default=0, editable=False
+    )
+
+    """The amount of questions failed."""
+    failed_answers = models.PositiveSmallIntegerField(
+        verbose_name=_("Failed answers count"), default=0, editable=False
+    )
+
+    TOTALS_FIELDS = (
+        "questions_count",
+        "finished_questions_count",
+        "user_points",
+        "max_points",
+        "perfect_answers",
+        "almost_answers",
+        "failed_answers",
+    )
+
     def save(self, **kwargs):
         """
         Generates a random unique slug on the fly if needed.
+
+        As slugs are unique-indexed, we don't check if a slug is available
+        before using it: we try to save the quizz, and if the slug was already
+        taken, we try again with another one.
         """
-        if not self.slug:
-            slug = None
-            while slug is None:
-                slug = "".join(
-                    random.choices(
-                        string.ascii_lowercase + string.digits,
-                        k=self._meta.get_field("slug").max_length,
-                    )
-                )
-                # We said unique slug
-                if Quizz.objects.filter(slug=slug).exists():
-                    slug = None
-            self.slug = slug
-        return super(Quizz, self).save(**kwargs)
+        if self.slug:
+            return super(Quizz, self).save(**kwargs)
+
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            self.slug = generate_slug(self._meta.get_field("slug").max_length)
+            try:
+                with transaction.atomic():
+                    return super(Quizz, self).save(**kwargs)
+            except IntegrityError:
+                # With 36^8 possible slugs, failing that many times means
+                # something else is wrong.
+                if attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                    raise
 
     @property
     def is_running(self):
         return not self.finished_at
 
+    def is_accessible_by(self, user):
+        """
+        Checks if the given user is allowed to access this quizz.
+
+        For ongoing quizzes, only the owner is allowed to access the quizz, or
+        everyone but only if the owner is anonymous. Finished quizzes can also
+        be viewed by users with the permission to view quizzes.
+
+        :param user: The user, possibly anonymous.
+        :return: True if the user is allowed to access this quizz.
+        """
+        if user.is_authenticated:
+            allowed = self.user_id == user.pk
+        else:
+            allowed = self.user_id is None
+
+        if not self.is_running:
+            allowed |= user.is_authenticated and user.has_perm("quizz.view_quizz")
+
+        return allowed
+
+    def start_current_question(self):
+        """
+        Records the moment the current question was displayed, unless it was
+        already displayed less than an hour ago.
+
+        As this is called when a quizz page is displayed, nothing is written
+        if the question was recently started, and else only this column is
+        updated, and only if no concurrent request already did so.
+        """
+        question = self.current_question
+        if not question:
+            return
+
+        now = timezone.now()
+        threshold = now - timedelta(hours=1)
+
+        if question.started_at and question.started_at > threshold:
+            return
+
+        QuizzQuestion.objects.filter(
+            Q(started_at__isnull=True) | Q(started_at__lte=threshold), pk=question.pk
+        ).update(started_at=now)
+        question.started_at = now
+
+    def finish_if_answered(self):
+        """
+        Marks this quizz as finished if all its questions were answered.
+        """
+        if self.is_running and self.questions_left == 0:
+            self.finished_at = timezone.now()
+            self.save(update_fields=["finished_at"])
+
     @cached_property
     def all_questions(self):
         return self.questions.order_by("order").prefetch_related("question")
 
     @cached_property
-    def current_question(self):
-        return self.questions.filter(finished_at__isnull=True).order_by("order").first()
+    def report(self):
+        """
+        Returns the questions of this quizz with everything needed to display
+        their corrections: the questions themselves, the user's answers, and
+        the proposed and linked answers they refer to.
+
+        This is loaded in two queries, whatever the amount of questions.
+
+        :return: A list of QuizzQuestion instances, in order.
+        """
+        return list(
+            self.questions.order_by("order")
+            .select_related("question", "question__source")
+            .prefetch_related(Quizz.prefetch_report_answers())
+        )
+
+    @staticmethod
+    def prefetch_report_answers():
+        """
+        Returns how to prefetch the user's answers to quizz questions, with
+        the proposed and linked answers they refer to, to display their
+        corrections.
+
+        :return: A Prefetch instance, for QuizzQuestion instances.
+        """
+        return Prefetch(
+            "answers",
+            queryset=QuizzAnswer.objects.select_related(
+                "proposed_answer", "proposed_answer__linked_answer", "linked_to"
+            ),
+        )
 
     @cached_property
+    def progress(self):
+        """
+        Returns the progress of this quizz, loaded in a single query.
+
+        :return: A QuizzProgress instance.
+        """
+        return QuizzProgress(
+            list(
+                self.questions.order_by("order").select_related(
+                    "question", "question__source"
+                )
+            )
+        )
+
+    @property
+    def current_question(self):
+        return self.progress.current_question
+
+    @property
     def questions_total(self):
-        return self.questions.count()
+        return self.progress.questions_total
 
-    @cached_property
+    @property
     def questions_finished(self):
-        return self.questions.filter(finished_at__isnull=False).count()
+        return self.progress.questions_finished
 
-    @cached_property
+    @property
     def questions_left(self):
-        return self.questions_total - self.questions_finished
+        return self.progress.questions_left
 
-    @cached_property
+    @property
     def points(self):
         """
         Returns a 3-tuple containing first the amount of points gained by the
@@ -501,15 +684,322 @@ class Quizz(models.Model):
 
         :return: (user_points, max_points, percentage)
         """
-        points = self.all_questions.aggregate(
-            user_points=Sum("points"), max_points=Sum("question__difficulty")
-        )
         return (
-            points["user_points"],
-            points["max_points"],
-            float(points["user_points"]) / float(points["max_points"]),
+            self.user_points,
+            self.max_points,
+            self.user_points / self.max_points if self.max_points else 0.0,
+        )
+
+    @property
+    def score(self):
+        """
+        :return: The percentage of success, as a number between 0 and 100.
+        """
+        return self.points[2] * 100
+
+    @staticmethod
+    def increment_totals(quizzes, questions, quizz=None):
+        """
+        Adds newly answered questions to the totals of quizzes.
+
+        :param quizzes: A queryset of the quizzes to update.
+        :param questions: The newly answered (and graded) QuizzQuestion
+                          instances.
+        :param quizz: A quizz instance to update in memory too, if any.
+        """
+        increments = {"finished_questions_count": 0, "user_points": 0.0}
+        increments.update({counter: 0 for counter in SUCCESS_COUNTERS.values()})
+
+        for question in questions:
+            increments["finished_questions_count"] += 1
+            increments["user_points"] += question.points
+            increments[SUCCESS_COUNTERS[question.success]] += 1
+
+        increments = {field: value for field, value in increments.items() if value}
+
+        quizzes.update(
+            **{field: F(field) + value for field, value in increments.items()}
+        )
+
+        if quizz is not None:
+            for field, value in increments.items():
+                setattr(quizz, field, getattr(quizz, field) + value)
+
+            Quizz.invalidate_ongoing_quizzes([quizz.user_id])
+        else:
+            Quizz.invalidate_ongoing_quizzes(quizzes.values_list("user_id", flat=True))
+
+    @staticmethod
+    def refresh_totals(quizzes):
+        """
+        Computes again the totals of the given quizzes from their questions,
+        e.g. after their questions were graded again. Cached reports are
+        invalidated.
+
+        :param quizzes: An iterable of quizzes primary keys.
+        """
+        totals = {pk: Quizz(pk=pk) for pk in quizzes}
+        if not totals:
+            return
+
+        rows = (
+            QuizzQuestion.objects.filter(quizz__in=totals.keys())
+            .values("quizz")
+            .annotate(
+                questions_count=Count("pk"),
+                finished_questions_count=Count("finished_at"),
+                user_points=Coalesce(Sum("points"), 0.0),
+                max_points=Coalesce(Sum("question__difficulty"), 0),
+                **{
+                    counter: Count("pk", filter=Q(success=success))
+                    for success, counter in SUCCESS_COUNTERS.items()
+                },
+            )
+        )
+
+        for row in rows:
+            quizz = totals[row.pop("quizz")]
+            for field, value in row.items():
+                setattr(quizz, field, value)
+
+        Quizz.objects.bulk_update(totals.values(), Quizz.TOTALS_FIELDS)
+        Quizz.bump_reports_version()
+
+    @staticmethod
+    def ongoing_quizzes_cache_key(user_pk):
+        return f"ongoing-quizzes:{user_pk}"
+
+    @staticmethod
+    def ongoing_quizzes_of(user):
+        """
+        Returns a summary of the ongoing quizzes of an user, cached until one
+        of them is created, answered or finished.
+
+        :param user: The user, or its primary key.
+        :return: A list of dicts with the slug, start date, and total and
+                 finished questions count of each ongoing quizz.
+        """
+        user_pk = getattr(user, "pk", user)
+
+        def summarize():
+            return [
+                {
+                    "slug": slug,
+                    "started_at": started_at,
+                    "questions_total": questions_total,
+                    "questions_finished": questions_finished,
+                }
+                for slug, started_at, questions_total, questions_finished in (
+                    Quizz.objects.filter(user_id=user_pk, finished_at__isnull=True)
+                    .order_by("started_at")
+                    .values_list(
+                        "slug",
+                        "started_at",
+                        "questions_count",
+                        "finished_questions_count",
+                    )
+                )
+            ]
+
+        return cache.get_or_set(
+            Quizz.ongoing_quizzes_cache_key(user_pk),
+            summarize,
+            ONGOING_QUIZZES_CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def invalidate_ongoing_quizzes(users_pks):
+        """
+        Invalidates the cached summaries of the ongoing quizzes of users, once
+        the current transaction is committed: else, a concurrent request could
+        cache them again before that, without the changes.
+
+        :param users_pks: An iterable of users primary keys. None values (for
+                          anonymous users) are ignored.
+        """
+        keys = [Quizz.ongoing_quizzes_cache_key(pk) for pk in set(users_pks) if pk]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @staticmethod
+    def reports_version():
+        """
+        Returns the current version of the quizzes reports. Rendered reports
+        are cached for a given version, which changes when questions are edited
+        or quizzes re-graded.
+
+        :return: The version, as an integer.
+        """
+        # If the version was evicted, starting from the current time ensures
+        # we never go back to a version already used.
+        return cache.get_or_set(
+            REPORTS_VERSION_CACHE_KEY, lambda: int(timezone.now().timestamp()), None
         )
 
+    @staticmethod
+    def bump_reports_version():
+        """
+        Invalidates all cached reports.
+        """
+        try:
+            cache.incr(REPORTS_VERSION_CACHE_KEY)
+        except ValueError:
+            Quizz.reports_version()
+
+    def register_answers(self, answers):
+        """
+        Grades and stores the answers to several questions of this quizz at
+        once, e.g. for a quizz passed offline. Everything is saved in a single
+        transaction, with bulk writes; the quizz is marked as finished if
+        there is no question left.
+
+        :param answers: A dict associating the order of the questions (as
+                        strings) to the data generated by their forms. Already
+                        answered questions are ignored.
+        :return: True if the answers were saved; False if any of them was not
+                 valid, in which case nothing is saved.
+        """
+        answered = []
+        user_answers = []
+
+        QuestionSnapshot.prefetch(
+            question.question
+            for question in self.progress.questions
+            if not question.is_finished
+        )
+
+        for question in self.progress.questions:
+            data = answers.get(str(question.order))
+            if question.is_finished or data is None:
+                continue
+
+            question_answers = question.grade(data)
+            if question_answers is None:
+                # The graded questions were updated in memory: they will be
+                # loaded again if needed.
+                del self.progress
+                return False
+
+            answered.append(question)
+            user_answers += [(question, answer) for answer in question_answers]
+
+        if not answered:
+            return True
+
+        through = QuizzQuestion.answers.through
+
+        with transaction.atomic():
+            bulk_create(
+                QuizzAnswer,
+                [answer for _, answer in user_answers],
+                link="quizzquestion",
+            )
+            through.objects.bulk_create(
+                [
+                    through(quizzquestion_id=question.pk, quizzanswer_id=answer.pk)
+                    for question, answer in user_answers
+                ]
+            )
+
+            QuizzQuestion.objects.bulk_update(
+                answered, ["finished_at", "open_answer", "points", "success"]
+            )
+            Quizz.increment_totals(Quizz.objects.filter(pk=self.pk), answered, self)
+
+            self.finish_if_answered()
+
+        if self.user_id is not None:
+            Profile.mark_questions_seen(
+                self.user_id, [question.question_id for question in answered]
+            )
+            QuestionReview.record_many(
+                self.user_id,
+                [(question.question_id, question.success) for question in answered],
+            )
+
+        return True
+
+    @staticmethod
+    def pool_key_for(
+        questions_count, locale=None, contest=None, difficulty=0, types_mix=None
+    ):
+        """
+        Returns the key identifying pre-generated quizzes for these criteria.
+        Quizzes restricted to some tags are never pre-generated.
+
+        :return: The key, as a string.
+        """
+        key = [
+            str(questions_count),
+            str(difficulty or 0),
+            str(locale.pk) if locale else "",
+            str(contest.pk) if contest else "",
+        ]
+
+        if types_mix and types_mix != DEFAULT_TYPES_MIX:
+            key.append(
+                ",".join(
+                    f"{question_type}{share}"
+                    for question_type, share in sorted(types_mix.items())
+                    if share > 0
+                )
+            )
+
+        return ":".join(key)
+
+    @staticmethod
+    def claim_pooled_quizz(pool_key, user, ip=None):
+        """
+        Claims a pre-generated quizz for the given user, if there is any
+        available for these criteria.
+
+        :param pool_key: The criteria key (see `pool_key_for`).
+        :param user: The user claiming the quizz. This can be None if the user
+                     is anonymous.
+        :param ip: The IP of the user passing this quizz.
+        :return: The claimed quizz, or None if there was none available.
+        """
+        user = user if user is not None and user.is_authenticated else None
+
+        # Other users may claim the same quizzes concurrently, so we only
+        # update a quizz if it's still in the pool, and try the next one
+        # else.
+        for quizz in Quizz.objects.filter(pool_key=pool_key)[:5]:
+            now = timezone.now()
+            claimed = Quizz.objects.filter(pk=quizz.pk, pool_key=pool_key).update(
+                pool_key=None, user=user, ip=ip, started_at=now
+            )
+
+            if claimed:
+                quizz.pool_key = None
+                quizz.user = user
+                quizz.ip = ip
+                quizz.started_at = now
+                Quizz.invalidate_ongoing_quizzes([quizz.user_id])
+                count_started_quizz(quizz)
+                return quizz
+
+        return None
+
+    @staticmethod
+    def discard_pooled_quizzes(question):
+        """
+        Deletes all pre-generated quizzes containing the given question, e.g.
+        because it was deleted or updated and may no longer match the
+        quizzes criteria.
+
+        :param question: The question.
+        """
+        quizzes = list(
+            Quizz.objects.filter(
+                pool_key__isnull=False, questions__question=question
+            ).values_list("pk", flat=True)
+        )
+
+        if quizzes:
+            QuizzQuestion.objects.filter(quizz__in=quizzes).delete()
+            Quizz.objects.filter(pk__in=quizzes).delete()
+
     @staticmethod
     def generate_quizz(
         user,
@@ -519,11 +1009,18 @@ class Quizz(models.Model):
         contest=None,
         tags=None,
         difficulty=None,
+        pooled=False,
+        prefer_unseen=False,
+        adaptive=False,
+        types_mix=None,
     ):
         """
         Generates and returns a new quizz for the given user and following
         the criteria.
 
+        If a quizz was generated in advance for these criteria, it is
+        returned instead.
+
         :param user: The user to generate this quizz for. This can be None if
                      the user is anonymous.
         :param questions_count: The amount of questions in the quizz.
@@ -536,96 +1033,237 @@ class Quizz(models.Model):
                      selected too.
         :param difficulty: The difficulty of the questions. Some questions with
                            a smaller difficulty may be selected.
+        :param pooled: If True, the quizz is generated in advance: it's not
+                       attached to any user and will be claimed later by
+                       someone asking a quizz with the same criteria.
+        :param prefer_unseen: If True, questions the user never answered are
+                              selected first. Ignored for anonymous users.
+        :param adaptive: If True, questions the user failed or almost failed
+                         and should review are selected first, then questions
+                         never answered (see `QuestionReview.priorities_for`).
+                         Ignored for anonymous users.
+        :param types_mix: A dict associating questions types to their share in
+                          the quizz, e.g. {QUESTION_MCQ: 60, QUESTION_OPEN: 20,
+                          QUESTION_LINKED: 20}. If None, only MCQ are selected.
 
         :return: The generated quizz instance, already saved.
         """
-        questions = Question.objects.all().filter(type="MCQ")
-
-        # We first hard-filter questions with strict conditions (locale, contest…)
+        user = user if user is not None and user.is_authenticated else None
+        prefer_unseen = prefer_unseen and user is not None
+        adaptive = adaptive and user is not None
+        types_mix = types_mix or DEFAULT_TYPES_MIX
+
+        pool_key = None
+        if not tags and not prefer_unseen and not adaptive:
+            pool_key = Quizz.pool_key_for(
+                questions_count, locale, contest, difficulty, types_mix
+            )
 
-        if locale:
-            questions = questions.filter(locale=locale)
+            if not pooled:
+                quizz = Quizz.claim_pooled_quizz(pool_key, user, ip)
+                if quizz:
+                    return quizz
 
-        if contest:
-            questions = questions.filter(source=contest)
+        # We first hard-filter questions with strict conditions (locale, contest…),
+        # using the in-memory questions index, so only primary keys and
+        # difficulties are handled here.
 
+        all_tags = None
         if tags:
             # We use all tags and their children on all levels
-            all_tags = set(tags)
+            all_tags = set()
             for tag in tags:
-                for child in tag.get_descendants():
-                    all_tags.add(child)
-            questions = questions.filter(tags__in=all_tags)
+                all_tags.add(tag.pk)
+                all_tags |= tags_closure.descendants(tag.pk)
+
+        # The case of difficulty is a bit different:
+        # if the user select “medium” we give him 80% medium and 20% easy questions
+        # (randomly with weights, so the amounts may be a little bit different).
+        # Here we only exclude questions with a too high difficulty.
+        # The candidates are looked up once, and split by type.
+        candidates = question_pool.candidates_by_type(
+            types=types_mix.keys(),
+            locale=locale.pk if locale else None,
+            contest=contest.pk if contest else None,
+            tags=all_tags,
+            max_difficulty=difficulty if difficulty != 0 else None,
+        )
 
-        if difficulty != 0:
-            # The case of difficulty is a bit different:
-            # if the user select “medium” we give him 80% medium and 20% easy questions
-            # (randomly with weights, so the amounts may be a little bit different).
-            # Here we only exclude questions with a too high difficulty.
-            questions = questions.filter(difficulty__lte=difficulty)
+        # Then we randomly select them in Python, to be able to have weighted
+        # random choice. Only the primary keys and difficulties of the
+        # candidates are known here, in compact arrays: full objects are never
+        # needed to generate the quizz.
+
+        # The questions are split between types following the requested mix
+        # (if there are not enough questions of a type, others are used
+        # instead), then selected independently in each type.
+        counts = allocate(
+            questions_count,
+            types_mix,
+            {question_type: len(pool) for question_type, pool in candidates.items()},
+        )
 
-        # Then we retrieve all questions matching these criteria, and we randomly
-        # select them in Python, to be able to have weighted random choice.
+        # If nothing match the criteria…
+        if not any(counts.values()):
+            return None
 
-        questions = list(questions)
-        questions_weights = []
+        seen_questions = None
+        review_priority = None
+        if adaptive:
+            # The user's reviews are loaded once, for all types.
+            review_priority = QuestionReview.priorities_for(user)
+        elif prefer_unseen:
+            seen_questions = Profile.seen_questions_of(user)
+
+        selected_questions = []
+
+        for question_type, count in counts.items():
+            questions = candidates[question_type]
+            if not count:
+                continue
+
+            priorities = None
+            if adaptive:
+                priorities = [review_priority(pk) for pk in questions.pks]
+            elif prefer_unseen:
+                # Questions already seen are only selected if there is not
+                # enough unseen ones.
+                priorities = [pk in seen_questions for pk in questions.pks]
+
+            selected_questions += weighted_sample(
+                list(questions),
+                [
+                    difficulty_weight(question_difficulty, difficulty)
+                    for question_difficulty in questions.difficulties
+                ],
+                count,
+                priorities=priorities,
+            )
 
-        questions_count = min(questions_count, len(questions))
+        # Types are mixed together in the quizz.
+        random.shuffle(selected_questions)
 
-        # If nothing match the criteria…
-        if not questions:
-            return None
+        # Now that we have the questions, we create the quizz in the database,
+        # using the order from the selected questions list.
 
-        # If we have to select questions
-        elif questions_count < len(questions):
-            for index, question in enumerate(questions):
-                weight = 100
+        # All questions are inserted at once, and linked to the quizz at once.
 
-                # Difficulty
-                if question.difficulty == difficulty:
-                    weight += 80
-                elif question.difficulty == difficulty - 1:
-                    weight += 20
-                elif question.difficulty == difficulty - 2:
-                    weight -= 10
+        with transaction.atomic():
+            # The pool may not know yet about questions deleted by other
+            # processes, so the selected ones are checked before insertion.
+            existing_questions = set(
+                Question.objects.filter(
+                    pk__in=[question_pk for question_pk, _ in selected_questions]
+                ).values_list("pk", flat=True)
+            )
+            selected_questions = [
+                (question_pk, question_difficulty)
+                for question_pk, question_difficulty in selected_questions
+                if question_pk in existing_questions
+            ]
+            if not selected_questions:
+                return None
+
+            if pooled:
+                quizz = Quizz(pool_key=pool_key)
+            else:
+                quizz = Quizz(user=user, ip=ip)
 
-                # TODO option to weight up new questions or questions with difficulties
+            quizz.questions_count = len(selected_questions)
+            quizz.max_points = sum(
+                question_difficulty for _, question_difficulty in selected_questions
+            )
+            quizz.save()
+
+            quizz.questions.add(
+                *bulk_create(
+                    QuizzQuestion,
+                    [
+                        QuizzQuestion(question_id=question_pk, order=index)
+                        for index, (question_pk, _) in enumerate(selected_questions)
+                    ],
+                    link="quizz",
+                )
+            )
 
-                questions_weights.insert(index, weight)
+        return quizz
 
-            # To avoid duplicated questions, we select questions one after
-            # another, removing them each time from the list, because
-            # random.choices selects randomly with duplicates.
-            selected_questions = []
-            for i in range(questions_count):
-                selected_question = random.choices(questions, questions_weights, k=1)[0]
-                index = questions.index(selected_question)
 
-                del questions[index]
-                del questions_weights[index]
+@receiver([models.signals.post_save, models.signals.pre_delete], sender=Question)
+def discard_pooled_quizzes_when_question_is_updated(sender, instance, **kwargs):
+    Quizz.discard_pooled_quizzes(instance)
 
-                selected_questions.append(selected_question)
 
-        # We will select all questions anyway, as we want as many as we have.
-        else:
-            selected_questions = questions
-            random.shuffle(selected_questions)
+@receiver([models.signals.post_save, models.signals.post_delete], sender=Question)
+@receiver([models.signals.post_save, models.signals.post_delete], sender=Answer)
+@receiver(models.signals.m2m_changed, sender=Question.answers.through)
+def invalidate_reports_when_questions_are_updated(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        Quizz.bump_reports_version()
 
-        # Now that we have the questions, we create the quizz in the database,
-        # using the order from the selected questions list.
 
-        quizz = Quizz(user=user if user.is_authenticated else None, ip=ip)
-        quizz.save()
+@receiver([models.signals.post_save, models.signals.post_delete], sender=Quizz)
+def invalidate_ongoing_quizzes_when_quizz_is_updated(sender, instance: Quizz, **kwargs):
+    Quizz.invalidate_ongoing_quizzes([instance.user_id])
 
-        for index, question in enumerate(selected_questions):
-            quizz.questions.create(question=question, order=index)
 
-        return quizz
+def count_started_quizz(quizz):
+    """
+    Counts a quizz in the statistics, when created for an user or claimed from
+    the pool.
+
+    The quizz is counted once the current transaction is committed, so that
+    the statistics rows are not locked while the quizz' questions are saved.
+
+    :param quizz: The started quizz.
+    """
+
+    def count():
+        new_anonymous = (
+            quizz.user_id is None
+            and quizz.ip is not None
+            and not Quizz.objects.filter(
+                user__isnull=True, pool_key__isnull=True, ip=quizz.ip
+            )
+            .exclude(pk=quizz.pk)
+            .exists()
+        )
+
+        Statistics.increment(
+            started_quizzes=1,
+            started_quizzes_questions=quizz.questions_count,
+            users_quizzes=1 if quizz.user_id else 0,
+            anonymous=1 if new_anonymous else 0,
+        )
+
+    transaction.on_commit(count)
 
 
 @receiver(models.signals.post_save, sender=Quizz)
-def clear_overview_cache_when_quizz_is_finished(
-    sender, instance: Quizz, created, **kwargs
+def count_quizzes_in_statistics(
+    sender, instance: Quizz, created, update_fields, **kwargs
 ):
-    if instance.finished_at:
-        cache.delete("overview-statistics")
+    if instance.pool_key is not None:
+        return
+
+    if created:
+        count_started_quizz(instance)
+
+    # Quizzes are finished by `finish_if_answered`, saving only this field.
+    if instance.finished_at and (
+        created or (update_fields and "finished_at" in update_fields)
+    ):
+        Statistics.increment(quizzes=1)
+
+
+@receiver(models.signals.post_delete, sender=Quizz)
+def uncount_quizzes_from_statistics(sender, instance: Quizz, **kwargs):
+    if instance.pool_key is not None:
+        return
+
+    Statistics.increment(
+        started_quizzes=-1,
+        started_quizzes_questions=-instance.questions_count,
+        users_quizzes=-1 if instance.user_id else 0,
+        quizzes=-1 if instance.finished_at else 0,
+    )
@@ -0,0 +1,370 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from quizz.models import QuestionSuccess
+from quizz.models.questions import Question
+from quizz.utils import as_choices
+
+
+def schedule_review(success, streak, answered_at):
+    """
+    Computes when a question should be asked again to an user, following
+    the spaced repetition principle: failed questions are asked again soon,
+    and the interval doubles each time a question is perfectly answered.
+
+    :param success: The success of the last answer (a QuestionSuccess value).
+    :param streak: The number of consecutive perfect answers before this one.
+    :param answered_at: The moment of the last answer.
+    :return: A tuple (new streak, moment of the next review).
+    """
+    if success == QuestionSuccess.PERFECT.value:
+        streak += 1
+        interval = timedelta(days=min(2 ** streak, 180))
+    elif success == QuestionSuccess.ALMOST.value:
+        streak = 0
+        interval = timedelta(days=1)
+    else:
+        streak = 0
+        interval = timedelta(minutes=10)
+
+    return streak, answered_at + interval
+
+
+class QuestionReview(models.Model):
+    """
+    The results of an user for a question, updated each time the user answers
+    it, to know when this question should be reviewed in the adaptive mode.
+
+    This is a materialized summary of the user's answers, so generating an
+    adaptive quizz never has to go through the whole answers history.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=_("The user"),
+        related_name="questions_reviews",
+    )
+
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        verbose_name=_("The question"),
+        related_name="reviews",
+    )
+
+    """The correctness of the user's last answer to this question."""
+    last_success = models.CharField(
+        verbose_name=_("Was the question correctly answered the last time?"),
+        choices=as_choices(QuestionSuccess),
+        max_length=8,
+    )
+
+    """How many times in a row the question was perfectly answered."""
+    streak = models.PositiveSmallIntegerField(
+        verbose_name=_("Consecutive perfect answers"), default=0
+    )
+
+    """The moment when the question was last answered."""
+    last_answered_at = models.DateTimeField(
+        verbose_name=_("The moment when the question was last answered")
+    )
+
+    """The moment after which the question should be asked again."""
+    next_review_at = models.DateTimeField(
+        verbose_name=_("The moment when the question should be reviewed")
+    )
+
+    class Meta:
+        unique_together = (("user", "question"),)
+        indexes = [models.Index(fields=["user", "next_review_at"])]
+
+    @staticmethod
+    def record(user, question, success):
+        """
+        Updates the review of a question after the user answered it.
+
+        :param user: The user, or its primary key.
+        :param question: The question, or its primary key.
+        :param success: The success of the answer (a QuestionSuccess value).
+        """
+        QuestionReview.record_many(user, [(getattr(question, "pk", question), success)])
+
+    @staticmethod
+    def record_many(user, results):
+        """
+        Updates the reviews of several questions after the user answered them,
+        with a constant number of queries.
+
+        :param user: The user, or its primary key.
+        :param results: An iterable of (question's primary key, success) tuples.
+        """
+        user_pk = getattr(user, "pk", user)
+        results = dict(results)
+        now = timezone.now()
+
+        with transaction.atomic():
+            reviews = {
+                review.question_id: review
+                for review in QuestionReview.objects.select_for_update().filter(
+                    user_id=user_pk, question_id__in=results.keys()
+                )
+            }
+
+            new_reviews = []
+            for question_pk, success in results.items():
+                review = reviews.get(question_pk)
+                if review is None:
+                    review = QuestionReview(user_id=user_pk, question_id=question_pk)
+                    new_reviews.append(review)
+
+                review.streak, review.next_review_at = schedule_review(
+                    success, review.streak, now
+                )
+                review.last_success = success
+                review.last_answered_at = now
+
+            if reviews:
+                QuestionReview.objects.bulk_update(
+                    reviews.values(),
+                    ["streak", "next_review_at", "last_success", "last_answered_at"],
+                )
+            if new_reviews:
+                QuestionReview.objects.bulk_create(new_reviews)
+
+    @staticmethod
+    def priorities_for(user):
+        """
+        Computes the priority of each question for an adaptive quizz. Lower
+        priorities are selected first:
+
+        0. questions due for review, and previously failed;
+        1. questions due for review, and previously almost succeeded;
+        2. questions due for review, and previously succeeded;
+        3. questions never answered;
+        4. questions answered, but not due for review yet.
+
+        All the user's reviews are loaded at once: they are bounded by the
+        user's history, unlike the candidate questions.
+
+        :param user: The user.
+        :return: A function returning the priority of a question, from its
+                 primary key.
+        """
+        now = timezone.now()
+        due_priorities = {
+            QuestionSuccess.FAILED.value: 0,
+            QuestionSuccess.ALMOST.value: 1,
+            QuestionSuccess.PERFECT.value: 2,
+        }
+
+        reviews = QuestionReview.objects.filter(user=user).values_list(
+            "question_id", "last_success", "next_review_at"
+        )
+        priorities = {
+            question_pk: due_priorities[last_success] if next_review_at <= now else 4
+            for question_pk, last_success, next_review_at in reviews
+        }
+
+        return lambda question_pk: priorities.get(question_pk, 3)
+
+
+class Statistics(models.Model):
+    """
+    Generic statistics about this instance, displayed in the management menu.
+
+    There is a single row, kept up to date by signals with atomic increments
+    as questions, users and quizzes are created, so displaying them is a
+    single-row read instead of aggregates over whole tables. Quizzes from the
+    pool are only counted when claimed.
+    """
+
+    """The amount of questions."""
+    questions = models.PositiveIntegerField(_("Questions"), default=0)
+
+    """The amount of registered users."""
+    users = models.PositiveIntegerField(_("Users"), default=0)
+
+    """
+    The amount of anonymous users, i.e. of distinct IP addresses having started
+    quizzes without being logged in. This is never decremented, as quizzes IPs
+    can be deleted over time.
+    """
+    anonymous = models.PositiveIntegerField(_("Anonymous users"), default=0)
+
+    """The amount of finished quizzes."""
+    quizzes = models.PositiveIntegerField(_("Finished quizzes"), default=0)
+
+    """The amount of started quizzes, finished or not."""
+    started_quizzes = models.PositiveIntegerField(_("Started quizzes"), default=0)
+
+    """The amount of quizzes started by registered users."""
+    users_quizzes = models.PositiveIntegerField(
+        _("Quizzes started by registered users"), default=0
+    )
+
+    """The total amount of questions in started quizzes."""
+    started_quizzes_questions = models.PositiveIntegerField(
+        _("Questions in started quizzes"), default=0
+    )
+
+    class Meta:
+        verbose_name_plural = _("Statistics")
+
+    PK = 1
+
+    @staticmethod
+    def increment(**counters):
+        """
+        Increments (or decrements) counters, and the same counters for today
+        if they are also counted by day.
+
+        The counters are updated once the current transaction is committed:
+        their rows would else stay locked until then, and every transaction
+        counting something (e.g. creating a quizz) would wait for the others.
+
+        :param counters: The amount to add to each counter, by name.
+        """
+        counters = {field: value for field, value in counters.items() if value}
+        if not counters:
+            return
+
+        transaction.on_commit(lambda: Statistics._increment(counters))
+
+    @staticmethod
+    def _increment(counters):
+        with transaction.atomic():
+            updated = Statistics.objects.filter(pk=Statistics.PK).update(
+                **{field: F(field) + value for field, value in counters.items()}
+            )
+
+            # The row is created with a full count the first time, so it
+            # already includes what we would have incremented.
+            if not updated:
+                Statistics.current()
+
+            DailyStatistics.increment(
+                timezone.localdate(),
+                **{
+                    field: value
+                    for field, value in counters.items()
+                    if field in DailyStatistics.COUNTERS
+                },
+            )
+
+    @staticmethod
+    def current():
+        """
+        Returns the statistics, counting everything if they were never
+        counted before.
+
+        :return: The Statistics instance.
+        """
+        statistics = Statistics.objects.filter(pk=Statistics.PK).first()
+        if statistics is None:
+            statistics, _ = Statistics.objects.get_or_create(
+                pk=Statistics.PK, defaults=Statistics.collect()
+            )
+
+        return statistics
+
+    @staticmethod
+    def collect():
+        """
+        Counts everything from scratch.
+
+        :return: A dict with the value of each counter.
+        """
+        # The quizzes module depends on this one, so it can't be imported here.
+        Quizz = apps.get_model("quizz", "Quizz")
+        started_quizzes = Quizz.objects.filter(pool_key__isnull=True)
+
+        return {
+            "questions": Question.objects.count(),
+            "users": User.objects.count(),
+            "anonymous": started_quizzes.filter(user__isnull=True)
+            .values("ip")
+            .distinct()
+            .count(),
+            "quizzes": started_quizzes.filter(finished_at__isnull=False).count(),
+            "started_quizzes": started_quizzes.count(),
+            "users_quizzes": started_quizzes.filter(user__isnull=False).count(),
+            "started_quizzes_questions": started_quizzes.aggregate(
+                questions=models.Count("questions")
+            )["questions"],
+        }
+
+    @property
+    def mean_quizzes_per_user(self):
+        return int(self.users_quizzes / self.users) if self.users else 0
+
+    @property
+    def mean_questions_per_quizz(self):
+        return (
+            int(self.started_quizzes_questions / self.started_quizzes)
+            if self.started_quizzes
+            else 0
+        )
+
+
+class DailyStatistics(models.Model):
+    """
+    Statistics counted by day, updated alongside the global ones.
+    """
+
+    date = models.DateField(_("Day"), unique=True)
+
+    """The amount of users registered this day."""
+    users = models.PositiveIntegerField(_("New users"), default=0)
+
+    """The amount of quizzes started this day."""
+    started_quizzes = models.PositiveIntegerField(_("Started quizzes"), default=0)
+
+    """The amount of quizzes finished this day."""
+    quizzes = models.PositiveIntegerField(_("Finished quizzes"), default=0)
+
+    class Meta:
+        verbose_name_plural = _("Daily statistics")
+
+    COUNTERS = ("users", "started_quizzes", "quizzes")
+
+    @staticmethod
+    def increment(date, **counters):
+        """
+        Increments counters for a day. Counters are never decremented, so
+        a past day keeps what happened this day.
+
+        :param date: The day.
+        :param counters: The amount to add to each counter, by name.
+        """
+        counters = {field: value for field, value in counters.items() if value > 0}
+        if not counters:
+            return
+
+        increments = {field: F(field) + value for field, value in counters.items()}
+        if not DailyStatistics.objects.filter(date=date).update(**increments):
+            DailyStatistics.objects.get_or_create(date=date)
+            DailyStatistics.objects.filter(date=date).update(**increments)
+
+
+@receiver([models.signals.post_save, models.signals.post_delete], sender=Question)
+def count_questions(sender, instance, created=False, **kwargs):
+    if created:
+        Statistics.increment(questions=1)
+    elif kwargs["signal"] is models.signals.post_delete:
+        Statistics.increment(questions=-1)
+
+
+@receiver([models.signals.post_save, models.signals.post_delete], sender=User)
+def count_users(sender, instance, created=False, **kwargs):
+    if created:
+        Statistics.increment(users=1)
+    elif kwargs["signal"] is models.signals.post_delete:
+        Statistics.increment(users=-1)
@@ -1,5 +1,4 @@
 import requests
-from django.core.cache import cache
 from django.core.files import File
 from django.dispatch import receiver
 
@@ -7,7 +6,7 @@ from os.path import splitext
 
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
 from path import TempDir
@@ -15,6 +14,8 @@ from path import TempDir
 from versatileimagefield.fields import VersatileImageField
 from versatileimagefield.placeholder import OnDiscPlaceholderImage
 
+from quizz.utils import Bitmap
+
 
 def profile_image_path(instance, filename):
     return f"users/{instance.user.pk}{splitext(filename)[1] or '.jpg'}"
@@ -32,6 +33,16 @@ class Profile(models.Model):
         verbose_name=_("User locale"), blank=True, null=True, max_length=6
     )
 
+    """
+    The questions this user already answered, as a bitmap over questions'
+    primary keys (see `quizz.utils.Bitmap`).
+    """
+    seen_questions = models.BinaryField(
+        verbose_name=_("Questions answered by the user"),
+        default=b"",
+        editable=False,
+    )
+
     """A picture to represent this user."""
     picture = VersatileImageField(
         verbose_name=_("User picture"),
@@ -43,6 +54,50 @@ class Profile(models.Model):
         ),
     )
 
+    @staticmethod
+    def seen_questions_of(user):
+        """
+        Returns the questions the given user already answered.
+
+        :param user: The user.
+        :return: A Bitmap of the questions' primary keys.
+        """
+        return Bitmap(
+            Profile.objects.filter(user=user)
+            .values_list("seen_questions", flat=True)
+            .first()
+        )
+
+    @staticmethod
+    def mark_questions_seen(user, questions_pks):
+        """
+        Records that the given user answered the given questions.
+
+        :param user: The user, or its primary key.
+        :param questions_pks: An iterable of the questions' primary keys.
+        """
+        with transaction.atomic():
+            profile = (
+                Profile.objects.select_for_update()
+                .only("pk", "seen_questions")
+                .filter(user=user)
+                .first()
+            )
+            if profile is None:
+                return
+
+            seen_questions = Bitmap(profile.seen_questions)
+            unseen_questions = [pk for pk in questions_pks if pk not in seen_questions]
+            if not unseen_questions:
+                return
+
+            for pk in unseen_questions:
+                seen_questions.add(pk)
+
+            Profile.objects.filter(pk=profile.pk).update(
+                seen_questions=bytes(seen_questions)
+            )
+
 
 @receiver(models.signals.post_save, sender=User)
 def create_profile_for_new_users(sender, instance, created, **kwargs):
@@ -58,12 +113,6 @@ def create_profile_for_new_users(sender, instance, created, **kwargs):
         profile.save()
 
 
-@receiver(models.signals.post_save, sender=User)
-def clear_overview_cache_when_user_is_created(sender, instance, created, **kwargs):
-    if created:
-        cache.delete("overview-statistics")
-
-
 def save_profile_picture(backend, user, response, *args, **kwargs):
     """
     This method is called in the social pipeline when a user logs in
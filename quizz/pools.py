@@ -0,0 +1,355 @@
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import Count, Max
+from django.dispatch import receiver
+
+from quizz.models.questions import Question
+
+
+class Candidates:
+    """
+    The questions matching some criteria, as two compact parallel arrays: their
+    primary keys, and their difficulties.
+
+    Iterating over candidates yields (pk, difficulty) tuples.
+    """
+
+    __slots__ = ("pks", "difficulties")
+
+    def __init__(self, pks=None, difficulties=None):
+        self.pks = pks if pks is not None else array("L")
+        self.difficulties = difficulties if difficulties is not None else array("B")
+
+    def __len__(self):
+        return len(self.pks)
+
+    def __iter__(self):
+        return zip(self.pks, self.difficulties)
+
+
+class QuestionPool:
+    """
+    A per-process index of the questions bank, used to find the questions
+    matching some quizz criteria without scanning the questions table.
+
+    For each question, only what's needed to generate a quizz is kept: its
+    primary key and difficulty, plus the criteria it can be selected by
+    (type, locale, contest and tags), indexed as sets of primary keys.
+
+    The index is built lazily on first use, then kept up-to-date by the
+    questions' signals. As other processes may update questions too, the state
+    of the questions table (its size, last update, and amount of tags links)
+    is checked at most every `CHECK_INTERVAL` seconds: if it doesn't match the
+    one this index was built for, the index is rebuilt.
+    """
+
+    CHECK_INTERVAL = 10
+    CHUNK_SIZE = 2000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._state = None
+        self._checked_at = 0
+        self._built = False
+
+        self._entries = {}
+        self._by_type = defaultdict(set)
+        self._by_locale = defaultdict(set)
+        self._by_contest = defaultdict(set)
+        self._by_tag = defaultdict(set)
+        self._by_difficulty = defaultdict(set)
+
+    def invalidate(self):
+        """
+        Marks this index as outdated. It will be rebuilt on next use.
+        """
+        with self._lock:
+            self._built = False
+
+    @staticmethod
+    def _current_state():
+        """
+        :return: A token changing whenever questions are added, updated,
+                 deleted, or (re)tagged.
+        """
+        questions = Question.objects.aggregate(
+            count=Count("pk"), last=Max("updated_at")
+        )
+        return (
+            questions["count"],
+            questions["last"],
+            Question.tags.through.objects.count(),
+        )
+
+    def _clear(self):
+        self._entries = {}
+        self._by_type = defaultdict(set)
+        self._by_locale = defaultdict(set)
+        self._by_contest = defaultdict(set)
+        self._by_tag = defaultdict(set)
+        self._by_difficulty = defaultdict(set)
+
+    def _build(self):
+        """
+        (Re)builds the whole index from the database.
+        """
+        self._clear()
+
+        # The state is read first, so changes made during the build are
+        # caught by the next check.
+        self._state = self._current_state()
+        self._checked_at = time.monotonic()
+
+        # Rows are streamed to avoid loading the whole table in memory at once.
+        tags = defaultdict(list)
+        for question_pk, tag_pk in Question.tags.through.objects.values_list(
+            "question_id", "tag_id"
+        ).iterator(chunk_size=self.CHUNK_SIZE):
+            tags[question_pk].append(tag_pk)
+
+        for (
+            pk,
+            question_type,
+            locale_pk,
+            contest_pk,
+            difficulty,
+        ) in Question.objects.values_list(
+            "pk", "type", "locale_id", "source_id", "difficulty"
+        ).iterator(
+            chunk_size=self.CHUNK_SIZE
+        ):
+            self._add(
+                pk,
+                question_type,
+                locale_pk,
+                contest_pk,
+                difficulty,
+                tuple(tags.pop(pk, ())),
+            )
+
+        self._built = True
+
+    def _add(self, pk, question_type, locale_pk, contest_pk, difficulty, tags):
+        self._entries[pk] = (question_type, locale_pk, contest_pk, difficulty, tags)
+
+        self._by_type[question_type].add(pk)
+        self._by_locale[locale_pk].add(pk)
+        self._by_contest[contest_pk].add(pk)
+        self._by_difficulty[difficulty].add(pk)
+        for tag_pk in tags:
+            self._by_tag[tag_pk].add(pk)
+
+    def _remove(self, pk):
+        if pk not in self._entries:
+            return
+
+        question_type, locale_pk, contest_pk, difficulty, tags = self._entries.pop(pk)
+
+        self._by_type[question_type].discard(pk)
+        self._by_locale[locale_pk].discard(pk)
+        self._by_contest[contest_pk].discard(pk)
+        self._by_difficulty[difficulty].discard(pk)
+        for tag_pk in tags:
+            self._by_tag[tag_pk].discard(pk)
+
+    def _ensure_fresh(self):
+        """
+        Rebuilds the index if it was never built, or if another process
+        updated the questions since.
+        """
+        if not self._built:
+            self._build()
+            return
+
+        if time.monotonic() - self._checked_at < self.CHECK_INTERVAL:
+            return
+
+        state = self._current_state()
+        self._checked_at = time.monotonic()
+        if state != self._state:
+            self._build()
+
+    def _updated(self, update):
+        """
+        Applies an incremental update to this index, after a change made by
+        this process, so it's visible right away.
+
+        The change is not enough to know whether other processes changed the
+        questions too in the meantime, so the state is not updated: the index
+        will be rebuilt at the next check.
+
+        :param update: A callable updating the index.
+        """
+        with self._lock:
+            # If the index was not built, it will be on next use, including
+            # this update.
+            if self._built:
+                update()
+
+    def update_question(self, pk):
+        """
+        Refreshes a question in the index, from the database.
+
+        :param pk: The question's primary key.
+        """
+
+        def update():
+            self._remove(pk)
+
+            question = (
+                Question.objects.filter(pk=pk)
+                .values_list("type", "locale_id", "source_id", "difficulty")
+                .first()
+            )
+            if question is None:
+                return
+
+            tags = tuple(
+                Question.tags.through.objects.filter(question_id=pk).values_list(
+                    "tag_id", flat=True
+                )
+            )
+            self._add(pk, *question, tags)
+
+        self._updated(update)
+
+    def remove_question(self, pk):
+        """
+        Removes a question from the index.
+
+        :param pk: The question's primary key.
+        """
+        self._updated(lambda: self._remove(pk))
+
+    def _matching(
+        self, types=None, locale=None, contest=None, tags=None, max_difficulty=None
+    ):
+        constraints = []
+
+        if types is not None:
+            constraints.append(set().union(*(self._by_type.get(t, ()) for t in types)))
+
+        if locale is not None:
+            constraints.append(self._by_locale.get(locale, set()))
+
+        if contest is not None:
+            constraints.append(self._by_contest.get(contest, set()))
+
+        if tags:
+            constraints.append(
+                set().union(*(self._by_tag.get(tag, ()) for tag in tags))
+            )
+
+        if max_difficulty is not None:
+            constraints.append(
+                set().union(
+                    *(
+                        pks
+                        for difficulty, pks in self._by_difficulty.items()
+                        if difficulty <= max_difficulty
+                    )
+                )
+            )
+
+        if not constraints:
+            return self._entries.keys()
+
+        # Intersecting from the smallest set is way faster.
+        constraints.sort(key=len)
+        return constraints[0].intersection(*constraints[1:])
+
+    def _candidates(self, pks):
+        pks = array("L", sorted(pks))
+        return Candidates(pks, array("B", (self._entries[pk][3] for pk in pks)))
+
+    def candidates(
+        self, types=None, locale=None, contest=None, tags=None, max_difficulty=None
+    ):
+        """
+        Returns the questions matching the given criteria.
+
+        :param types: An iterable of question types to select. If None, all types.
+        :param locale: The primary key of the locale to restrict questions to.
+                       If None, no restriction.
+        :param contest: The primary key of the contest of the questions. If None,
+                        no restriction.
+        :param tags: An iterable of tags primary keys. Questions with any of
+                     these tags are selected. Children tags are NOT included
+                     automatically. If None or empty, no restriction.
+        :param max_difficulty: The maximal difficulty of the questions. If None,
+                               no restriction.
+        :return: The matching questions, as Candidates sorted by primary key.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return self._candidates(
+                self._matching(types, locale, contest, tags, max_difficulty)
+            )
+
+    def candidates_by_type(self, types, **criteria):
+        """
+        Returns the questions matching the given criteria, split by type.
+
+        The criteria are resolved once for all types, and the matching
+        questions are then partitioned, so asking for more types does not
+        multiply the cost of the lookup.
+
+        :param types: An iterable of question types to select.
+        :param criteria: The other criteria, as for `candidates`.
+        :return: A dict associating each type to its matching questions, as
+                 Candidates sorted by primary key.
+        """
+        with self._lock:
+            self._ensure_fresh()
+
+            by_type = {question_type: [] for question_type in types}
+            for pk in self._matching(types=by_type.keys(), **criteria):
+                by_type[self._entries[pk][0]].append(pk)
+
+            return {
+                question_type: self._candidates(pks)
+                for question_type, pks in by_type.items()
+            }
+
+
+"""The question pool of this process."""
+question_pool = QuestionPool()
+
+
+@receiver(models.signals.post_save, sender=Question)
+def update_question_pool_when_question_is_saved(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: question_pool.update_question(pk))
+
+
+@receiver(models.signals.post_delete, sender=Question)
+def update_question_pool_when_question_is_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: question_pool.remove_question(pk))
+
+
+@receiver(models.signals.m2m_changed, sender=Question.tags.through)
+def update_question_pool_when_question_tags_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    # The relation may be altered from the tag side too.
+    if reverse:
+        if pk_set is None:
+            transaction.on_commit(question_pool.invalidate)
+            return
+        pks = list(pk_set)
+    else:
+        pks = [instance.pk]
+
+    def update():
+        for pk in pks:
+            question_pool.update_question(pk)
+
+    transaction.on_commit(update)
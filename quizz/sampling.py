@@ -0,0 +1,111 @@
+import heapq
+import itertools
+import math
+import random
+
+
+def difficulty_weight(question_difficulty, difficulty):
+    """
+    Computes the weight of a question in the random selection of a quizz'
+    questions, according to the difficulty asked by the user.
+
+    If the user select “medium”, medium questions are way more likely to be
+    selected than easy ones, and so on.
+
+    :param question_difficulty: The difficulty of the question.
+    :param difficulty: The difficulty asked by the user (0 if indifferent).
+    :return: The weight of the question.
+    """
+    weight = 100
+
+    if question_difficulty == difficulty:
+        weight += 80
+    elif question_difficulty == difficulty - 1:
+        weight += 20
+    elif question_difficulty == difficulty - 2:
+        weight -= 10
+
+    # TODO option to weight up new questions or questions with difficulties
+
+    return weight
+
+
+def weighted_sample(population, weights, k, priorities=None, rng=random):
+    """
+    Randomly selects k distinct items from the population, with probabilities
+    proportional to their weights. This is equivalent to drawing one item
+    after another without replacement, but in O(n + k log n) instead of O(n·k).
+
+    Each item gets a random key following an exponential distribution of rate
+    equal to its weight (Efraimidis & Spirakis); the items with the smallest
+    keys are selected, in the order they would have been drawn.
+
+    :param population: A sequence of items to select from.
+    :param weights: A sequence of weights, one per item. Items with a
+                    non-positive weight are never selected.
+    :param k: The number of items to select. If there are not enough items,
+              all (selectable) items are returned.
+    :param priorities: An optional sequence of priorities, one per item. If
+                       given, all items with a lower priority are selected
+                       before any item with a higher priority is.
+    :param rng: The random generator to use (anything with a `random` method).
+    :return: A list of the selected items, in selection order.
+    """
+    if priorities is None:
+        priorities = itertools.repeat(0)
+
+    keys = [
+        (priority, -math.log(1.0 - rng.random()) / weight, index)
+        for index, (weight, priority) in enumerate(zip(weights, priorities))
+        if weight > 0
+    ]
+    heapq.heapify(keys)
+
+    return [population[heapq.heappop(keys)[2]] for _ in range(min(k, len(keys)))]
+
+
+def allocate(k, shares, available):
+    """
+    Splits k items between strata, proportionally to their shares, without
+    taking more items from a stratum than it has available.
+
+    Quotas are rounded using the largest remainder method, so the counts
+    always add up. What a stratum cannot provide is redistributed between the
+    others, still proportionally to their shares.
+
+    :param k: The total number of items to select.
+    :param shares: A dict associating each stratum to its share (any positive
+                   number; shares are relative to each other).
+    :param available: A dict associating each stratum to the number of
+                      items available in it.
+    :return: A dict associating each stratum to the number of items to
+             select from it. The total is lower than k only if there are not
+             enough items available.
+    """
+    counts = {stratum: 0 for stratum in shares}
+    strata = [
+        stratum
+        for stratum, share in shares.items()
+        if share > 0 and available.get(stratum, 0) > 0
+    ]
+    remaining = min(k, sum(available[stratum] for stratum in strata))
+
+    while remaining > 0 and strata:
+        total = sum(shares[stratum] for stratum in strata)
+        quotas = {stratum: remaining * shares[stratum] / total for stratum in strata}
+        rounded = {stratum: int(quota) for stratum, quota in quotas.items()}
+
+        by_remainder = sorted(
+            strata, key=lambda stratum: quotas[stratum] - rounded[stratum], reverse=True
+        )
+        for stratum in by_remainder[: remaining - sum(rounded.values())]:
+            rounded[stratum] += 1
+
+        for stratum in strata:
+            taken = min(rounded[stratum], available[stratum] - counts[stratum])
+            counts[stratum] += taken
+            remaining -= taken
+
+        strata = [stratum for stratum in strata if counts[stratum] < available[stratum]]
+
+    return counts
@@ -0,0 +1,72 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from ..caching import get_or_refresh
+
+
+class CachingTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_values_are_cached_while_fresh(self):
+        self.assertEqual(get_or_refresh("key", self.compute, fresh_for=60), 1)
+        self.assertEqual(get_or_refresh("key", self.compute, fresh_for=60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_values_are_served_while_refreshed(self):
+        get_or_refresh("key", self.compute, fresh_for=-1)
+        self.assertEqual(
+            get_or_refresh("key", self.compute, fresh_for=-1, background=False),
+            2,
+            "Without background refresh, the refreshing process waits",
+        )
+
+        # The background refresh is run right away instead.
+        with mock.patch("quizz.caching.threading.Thread") as thread:
+            thread.side_effect = lambda target, daemon: mock.Mock(start=target)
+            self.assertEqual(
+                get_or_refresh("key", self.compute, fresh_for=60),
+                2,
+                "The stale value is served while being refreshed",
+            )
+
+        self.assertEqual(get_or_refresh("key", self.compute, fresh_for=60), 3)
+        self.assertEqual(self.calls, 3)
+
+    def test_values_are_computed_once_at_a_time(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_compute():
+            started.set()
+            release.wait(5)
+            return self.compute()
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    get_or_refresh("key", slow_compute, fresh_for=60)
+                )
+            )
+            for _ in range(5)
+        ]
+
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [1] * 5)
+        self.assertEqual(self.calls, 1)
@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+
+from ..grading import grade_linked, grade_mcq, grade_open
+from ..constants import QuestionSuccess
+
+PERFECT = QuestionSuccess.PERFECT.value
+ALMOST = QuestionSuccess.ALMOST.value
+FAILED = QuestionSuccess.FAILED.value
+
+
+class GradingTestCase(SimpleTestCase):
+    def test_grade_open(self):
+        self.assertEqual(grade_open(2, "pinot noir", "PINOT  noir!"), (2, PERFECT))
+        self.assertEqual(grade_open(2, "pinot noir", "Pino noi"), (1.0, ALMOST))
+        self.assertEqual(grade_open(2, "pinot noir", "Chardonnay"), (0, FAILED))
+
+    def test_grade_mcq(self):
+        answers = [(1, True), (2, True), (3, False)]
+
+        self.assertEqual(grade_mcq(3, answers, {1, 2}), (3, PERFECT))
+        self.assertEqual(grade_mcq(3, answers, {1}), (1.5, PERFECT))
+        self.assertEqual(
+            grade_mcq(3, answers, {1, 3}), (0, FAILED), "Wrong answers are penalized"
+        )
+        self.assertEqual(
+            grade_mcq(
+                3,
+                answers,
+                {1, 2},
+                has_open_choice=True,
+                open_valid_answer="",
+                open_answer="Something",
+            ),
+            (2, FAILED),
+            "The open answer must be left blank if there is none",
+        )
+
+    def test_grade_linked(self):
+        pairs = {1: 10, 2: 20, 3: 30, 4: 40}
+
+        self.assertEqual(grade_linked(2, pairs, pairs), (2, PERFECT))
+        self.assertEqual(
+            grade_linked(2, pairs, {1: 10, 2: 20, 3: 40, 4: 30}), (1, FAILED)
+        )
+        self.assertEqual(grade_linked(2, {}, {}), (0, FAILED))
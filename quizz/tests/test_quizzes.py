@@ -0,0 +1,775 @@
+import json
+from io import StringIO
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import (
+    DailyStatistics,
+    Profile,
+    Question,
+    QuestionLocale,
+    Quizz,
+    QuizzAnswer,
+    QuizzQuestion,
+    Statistics,
+    Tag,
+    QUESTION_LINKED,
+    QUESTION_MCQ,
+    QUESTION_OPEN,
+)
+from ..pools import question_pool
+
+
+class QuizzesMixin:
+    def setUp(self):
+        self.locale = QuestionLocale.objects.create(code="fr_FR", name="Français")
+        self.other_locale = QuestionLocale.objects.create(code="en_US", name="English")
+
+        self.parent_tag = Tag.objects.create(name="Vignes")
+        self.child_tag = Tag.objects.create(name="Cépages", parent=self.parent_tag)
+
+        self.questions = [
+            Question.create_mcq(
+                question=f"Question {i}",
+                answers=[
+                    {"answer": "Correct", "is_correct": True},
+                    {"answer": "Incorrect", "is_correct": False},
+                ],
+                locale=self.locale,
+                difficulty=(i % 3) + 1,
+                tags=[self.child_tag] if i % 2 else [],
+            )
+            for i in range(12)
+        ]
+
+        Question.create_open(
+            question="An open question", answer="Answer", locale=self.other_locale
+        )
+
+        # Signals update the pool on commit, which never happens in most tests.
+        question_pool.invalidate()
+
+    def generate(self, **kwargs):
+        kwargs.setdefault("difficulty", 0)
+        kwargs.setdefault("user", AnonymousUser())
+        return Quizz.generate_quizz(questions_count=kwargs.pop("count", 10), **kwargs)
+
+
+class QuizzGenerationTestCase(QuizzesMixin, TestCase):
+    def test_generation(self):
+        quizz = self.generate()
+
+        self.assertEqual(quizz.questions_total, 10)
+        self.assertEqual(
+            len({question.question_id for question in quizz.all_questions}),
+            10,
+            "A question cannot be selected twice",
+        )
+        self.assertEqual(
+            [question.order for question in quizz.all_questions],
+            list(range(10)),
+            "Questions are ordered in the order they were selected",
+        )
+
+    def test_generation_runs_constant_queries(self):
+        def generation_queries(count):
+            with CaptureQueriesContext(connection) as queries:
+                quizz = self.generate(count=count)
+            self.assertEqual(quizz.questions_total, count)
+            return [query["sql"] for query in queries]
+
+        generation_queries(1)
+        small, large = generation_queries(2), generation_queries(10)
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(
+            sum(sql.startswith('INSERT INTO "quizz_quizzquestion"') for sql in large),
+            1,
+            "Questions are inserted at once",
+        )
+
+    def test_progress_is_loaded_at_once(self):
+        quizz = Quizz.objects.get(pk=self.generate(count=3).pk)
+
+        with self.assertNumQueries(1):
+            current_question = quizz.current_question
+            self.assertEqual(current_question.order, 0)
+            self.assertIsNone(current_question.question.source)
+            self.assertEqual((quizz.questions_total, quizz.questions_left), (3, 3))
+
+        current_question.register_answer({"answers": []}, quizz=quizz)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(quizz.current_question.order, 1)
+            self.assertEqual((quizz.questions_finished, quizz.questions_left), (1, 2))
+
+    def test_generation_with_criteria(self):
+        self.assertIsNone(
+            self.generate(locale=self.other_locale),
+            "Only MCQ are selected, so no quizz can be generated",
+        )
+
+        quizz = self.generate(tags=[self.parent_tag], difficulty=2)
+        self.assertEqual(
+            {question.question for question in quizz.all_questions},
+            {
+                question
+                for question in self.questions
+                if question.difficulty <= 2 and question.tags.exists()
+            },
+            "Tags children are included and too difficult questions excluded",
+        )
+
+    def test_generation_with_types_mix(self):
+        for i in range(3):
+            Question.create_open(
+                question=f"Open question {i}", answer="Answer", locale=self.locale
+            )
+        question_pool.invalidate()
+
+        quizz = self.generate(
+            count=5, locale=self.locale, types_mix={QUESTION_MCQ: 60, QUESTION_OPEN: 40}
+        )
+        self.assertEqual(
+            sorted(question.question.type for question in quizz.all_questions),
+            [QUESTION_MCQ] * 3 + [QUESTION_OPEN] * 2,
+        )
+
+        quizz = self.generate(count=5, types_mix={QUESTION_OPEN: 100})
+        self.assertEqual(
+            quizz.questions_total, 4, "Only as many questions as available are used"
+        )
+
+    def test_displaying_a_question_only_writes_its_start(self):
+        quizz = self.generate(count=2)
+        url = reverse("quizz:quizz", args=(quizz.slug,))
+
+        def writes():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            return [q["sql"] for q in queries if not q["sql"].startswith("SELECT")]
+
+        (update,) = writes()
+        self.assertTrue(update.startswith('UPDATE "quizz_quizzquestion"'))
+        self.assertIn('SET "started_at"', update)
+        self.assertIsNotNone(quizz.current_question.started_at)
+
+        self.assertEqual(writes(), [], "Refreshing the page writes nothing")
+
+    def test_report_is_loaded_in_constant_queries(self):
+        Question.create_linked(
+            question="Link them",
+            answers=[(f"Left {i}", f"Right {i}") for i in range(4)],
+            locale=self.locale,
+        )
+        question_pool.invalidate()
+
+        def report_queries(count):
+            quizz = self.generate(
+                count=count, types_mix={QUESTION_MCQ: 50, QUESTION_LINKED: 50}
+            )
+            for question in quizz.all_questions:
+                question.register_answer({"answers": []})
+            quizz.finish_if_answered()
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("quizz:quizz", args=(quizz.slug,)))
+            self.assertContains(response, "Left 0")
+            return len(queries)
+
+        self.assertEqual(report_queries(2), report_queries(9))
+
+    def test_reports_are_cached(self):
+        quizz = self.generate(count=3)
+        for question in quizz.all_questions:
+            question.register_answer({"answers": []})
+        quizz.finish_if_answered()
+        url = reverse("quizz:quizz", args=(quizz.slug,))
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertContains(self.client.get(url), "Question")
+        self.assertFalse(
+            any("quizz_quizzanswer" in query["sql"] for query in queries),
+            "The corrections are rendered from the cache",
+        )
+
+        # Only the quizz is loaded to revalidate its report.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Fixing a question invalidates all the reports.
+        self.questions[0].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_open_valid_answers_are_normalized_on_save(self):
+        question = Question.create_open(
+            question="Which appellation?", answer="Côte Rôtie!", locale=self.locale
+        )
+        self.assertEqual(question.open_valid_answer_normalized, "cote rotie")
+
+        question.open_valid_answer = "Hermitage"
+        question.save(update_fields=["open_valid_answer"])
+        question.refresh_from_db()
+        self.assertEqual(question.open_valid_answer_normalized, "hermitage")
+        question_pool.invalidate()
+
+        quizz = self.generate(count=1, locale=self.locale, types_mix={QUESTION_OPEN: 1})
+        quizz_question = quizz.current_question
+        quizz_question.register_answer({"answer": "HERMITAGE"})
+        self.assertEqual(quizz_question.points, question.difficulty)
+
+    def test_linked_answers_are_graded_in_bulk(self):
+        question = Question.create_linked(
+            question="Link them",
+            answers=[(f"Left {i}", f"Right {i}") for i in range(10)],
+            locale=self.locale,
+        )
+        question_pool.invalidate()
+
+        quizz = self.generate(count=1, types_mix={QUESTION_LINKED: 100})
+        quizz_question = quizz.current_question
+
+        answers = question.selectable_answers_with_pk
+        data = {str(answer[0]): str(linked[0]) for answer, linked in answers}
+        # Swapping two answers fails two pairs.
+        (first, _), (second, _) = answers[:2]
+        data[str(first[0])], data[str(second[0])] = (
+            data[str(second[0])],
+            data[str(first[0])],
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(quizz_question.register_answer(data))
+
+        # Answers are read only once; if the database cannot return the
+        # primary keys of bulk-inserted rows, they are selected again once.
+        self.assertLessEqual(
+            len([q for q in queries if q["sql"].startswith("SELECT")]),
+            5,
+            "Answers are not fetched one by one",
+        )
+        self.assertEqual(
+            sum(
+                query["sql"].startswith('INSERT INTO "quizz_quizzanswer"')
+                for query in queries
+            ),
+            1,
+            "Answers are inserted at once",
+        )
+        self.assertEqual(quizz_question.points, question.difficulty * 0.8)
+        self.assertEqual(quizz_question.answers.count(), 10)
+        self.assertEqual(
+            quizz_question.answers.filter(
+                linked_to=F("proposed_answer__linked_answer")
+            ).count(),
+            8,
+        )
+
+    def test_mcq_answers_are_saved_atomically(self):
+        quizz_question = self.generate(count=1).current_question
+        correct = quizz_question.question.answers.get(is_correct=True)
+
+        with mock.patch.object(QuizzQuestion, "save", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                quizz_question.register_answer({"answers": [str(correct.pk)]})
+
+        self.assertFalse(QuizzAnswer.objects.exists(), "Nothing is half-saved")
+
+        with CaptureQueriesContext(connection) as queries:
+            quizz_question.register_answer({"answers": [str(correct.pk)]})
+        self.assertEqual(
+            sum(
+                query["sql"].startswith('INSERT INTO "quizz_quizzanswer"')
+                for query in queries
+            ),
+            1,
+            "Answers are saved with a single insert",
+        )
+        self.assertEqual(
+            {
+                (answer.proposed_answer_id, answer.is_checked)
+                for answer in quizz_question.answers.all()
+            },
+            {
+                (answer.pk, answer.is_correct)
+                for answer in quizz_question.question.answers.all()
+            },
+        )
+        self.assertEqual(quizz_question.points, quizz_question.question.difficulty)
+
+    def test_rescore_quizzes_command(self):
+        quizz = self.generate(count=3)
+        for question in quizz.all_questions:
+            correct = question.question.answers.get(is_correct=True)
+            question.register_answer({"answers": [str(correct.pk)]})
+
+        # The answers key of the first question was wrong.
+        fixed = quizz.all_questions[0]
+        for answer in fixed.question.answers.all():
+            answer.is_correct = not answer.is_correct
+            answer.save()
+
+        # The second one was fixed in the editor, which replaces the answers.
+        edited = quizz.all_questions[1].question
+        edited.update_mcq(
+            answers=[
+                {"answer": "Correct", "is_correct": False},
+                {"answer": "Incorrect", "is_correct": True},
+            ],
+            difficulty=edited.difficulty,
+        )
+
+        out = StringIO()
+        call_command("rescore_quizzes", chunk_size=2, stdout=out)
+
+        self.assertIn("2 of 3 answers re-graded.", out.getvalue())
+        quizz.refresh_from_db()
+        self.assertEqual((quizz.perfect_answers, quizz.failed_answers), (1, 2))
+        self.assertEqual(
+            list(quizz.questions.order_by("order").values_list("points", "success")),
+            [(0, "FAILED"), (0, "FAILED")]
+            + [
+                (question.question.difficulty, "PERFECT")
+                for question in quizz.all_questions[2:]
+            ],
+        )
+
+    def test_totals_are_updated_when_answering(self):
+        quizz = self.generate(count=3)
+        questions = list(quizz.all_questions)
+        self.assertEqual(quizz.questions_count, 3)
+        self.assertEqual(
+            quizz.max_points,
+            sum(question.question.difficulty for question in questions),
+        )
+
+        correct = questions[0].question.answers.get(is_correct=True)
+        questions[0].register_answer({"answers": [str(correct.pk)]}, quizz=quizz)
+        incorrect = questions[1].question.answers.get(is_correct=False)
+        questions[1].register_answer({"answers": [str(incorrect.pk)]}, quizz=quizz)
+
+        in_memory = [getattr(quizz, field) for field in Quizz.TOTALS_FIELDS]
+        quizz.refresh_from_db()
+        stored = [getattr(quizz, field) for field in Quizz.TOTALS_FIELDS]
+
+        self.assertEqual(in_memory, stored)
+        self.assertEqual(
+            stored, [3, 2, questions[0].question.difficulty, quizz.max_points, 1, 0, 1]
+        )
+
+        # Totals can be computed again from scratch.
+        Quizz.objects.filter(pk=quizz.pk).update(
+            **{field: 0 for field in Quizz.TOTALS_FIELDS}
+        )
+        call_command("refresh_quizzes_totals", stdout=StringIO())
+        quizz.refresh_from_db()
+        self.assertEqual(
+            [getattr(quizz, field) for field in Quizz.TOTALS_FIELDS], stored
+        )
+
+    def test_offline_quizz(self):
+        quizz = self.generate(count=3)
+        bundle_url = reverse("quizz:quizz-bundle", args=(quizz.slug,))
+
+        response = self.client.get(reverse("quizz:quizz-offline", args=(quizz.slug,)))
+        self.assertContains(response, bundle_url)
+
+        bundle = self.client.get(bundle_url).json()
+        self.assertEqual(len(bundle["questions"]), 3)
+        self.assertNotIn(
+            "is_correct", str(bundle), "Answers keys are not in the bundle"
+        )
+
+        answers = {
+            str(question["order"]): {"answers": [str(question["choices"][0][0])]}
+            for question in bundle["questions"]
+        }
+        invalid = dict(answers, **{"0": {"answers": ["-1"]}})
+
+        response = self.client.post(
+            bundle_url, json.dumps({"answers": {"0": "x"}}), "application/json"
+        )
+        self.assertEqual(response.status_code, 400, "Answers must be objects")
+
+        response = self.client.post(
+            bundle_url, json.dumps({"answers": invalid}), "application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(QuizzAnswer.objects.exists(), "Nothing is saved if invalid")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                bundle_url, json.dumps({"answers": answers}), "application/json"
+            )
+        self.assertEqual(response.json()["finished"], True)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(
+            sum(
+                query["sql"].startswith('INSERT INTO "quizz_quizzanswer"')
+                for query in queries
+            ),
+            1,
+            "The answers of all questions are inserted at once",
+        )
+
+        quizz.refresh_from_db()
+        self.assertFalse(quizz.is_running)
+        self.assertEqual(quizz.finished_questions_count, 3)
+        self.assertEqual(QuizzAnswer.objects.count(), 6)
+
+    def test_api(self):
+        self.client = Client(enforce_csrf_checks=True)
+        create_url = reverse("quizz:api:create-quizz")
+        data = json.dumps({"how_many": 2, "types": "mcq"})
+
+        self.assertEqual(
+            self.client.post(create_url, data, "application/json").status_code, 403
+        )
+
+        # A new client gets its token (and cookie) from the API.
+        csrf_token = self.client.get(create_url).json()["csrf_token"]
+        self.client.defaults["HTTP_X_CSRFTOKEN"] = csrf_token
+
+        response = self.client.post(create_url, data, "application/json")
+        self.assertEqual(response.status_code, 201)
+        slug = response.json()["slug"]
+
+        question_url = reverse("quizz:api:quizz-question", args=(slug,))
+        answer_url = reverse("quizz:api:quizz-answer", args=(slug,))
+        report_url = reverse("quizz:api:quizz-report", args=(slug,))
+
+        self.assertEqual(self.client.get(report_url).status_code, 409)
+
+        for order in range(2):
+            response = self.client.get(question_url)
+            question = response.json()["question"]
+            self.assertEqual(question["order"], order)
+            self.assertNotIn("is_correct", str(question))
+
+            response = self.client.get(
+                question_url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+            self.assertEqual(response.status_code, 304)
+
+            answer = {"order": order, "answers": [question["choices"][0][0]]}
+            response = self.client.post(answer_url, answer)
+            self.assertEqual(response.json()["questions_left"], 1 - order)
+
+            response = self.client.post(
+                answer_url, json.dumps(answer), "application/json"
+            )
+            self.assertEqual(response.status_code, 409, "Answered questions are final")
+
+        self.assertTrue(self.client.get(question_url).json()["finished"])
+
+        quizz = Quizz.objects.get(slug=slug)
+        with self.assertNumQueries(3):
+            report = self.client.get(report_url)
+        self.assertEqual(report.json()["user_points"], quizz.user_points)
+        self.assertEqual(len(report.json()["questions"]), 2)
+        self.assertEqual(
+            self.client.get(report_url, HTTP_IF_NONE_MATCH=report["ETag"]).status_code,
+            304,
+        )
+
+        # Quizzes created before their totals were stored are still served.
+        Quizz.objects.filter(slug=slug).update(questions_count=0)
+        self.assertEqual(self.client.get(report_url).status_code, 200)
+
+        # The report shows what was answered, even once the answers of the
+        # questions are replaced in the editor.
+        def answered(report):
+            return [
+                {
+                    (choice["answer"], choice["is_checked"])
+                    for choice in question["choices"]
+                }
+                for question in report["questions"]
+            ]
+
+        edited = quizz.all_questions[0].question
+        edited.update_mcq(
+            answers=[
+                {"answer": "Right", "is_correct": True},
+                {"answer": "Wrong", "is_correct": False},
+            ],
+            difficulty=edited.difficulty,
+        )
+        self.assertEqual(
+            answered(self.client.get(report_url).json()), answered(report.json())
+        )
+
+    def test_questions_snapshots_are_cached(self):
+        question = Question.objects.get(pk=self.questions[0].pk)
+        correct = question.answers.get(is_correct=True)
+
+        self.assertIn((correct.pk, "Correct", True), question.snapshot.choices)
+
+        # Another instance of the same question uses the cached snapshot.
+        question = Question.objects.get(pk=question.pk)
+        with self.assertNumQueries(0):
+            form = question.form_class(question=question)
+        self.assertEqual(len(form.fields["answers"].choices), 2)
+
+        correct.is_correct = False
+        correct.save()
+
+        self.assertIn(
+            (correct.pk, "Correct", False),
+            Question.objects.get(pk=question.pk).snapshot.choices,
+            "Updating an answer invalidates the snapshot",
+        )
+
+    def test_pool_is_kept_up_to_date(self):
+        question_pool.candidates()
+
+        question = self.questions[0]
+        question.difficulty = 3
+        question.save()
+        question_pool.update_question(question.pk)
+
+        self.assertIn((question.pk, 3), question_pool.candidates(max_difficulty=3))
+        self.assertNotIn((question.pk, 3), question_pool.candidates(max_difficulty=2))
+
+        question_pool.remove_question(question.pk)
+        self.assertNotIn((question.pk, 3), question_pool.candidates())
+
+    def test_pool_catches_up_with_other_processes(self):
+        question_pool.candidates()
+
+        # Another process deletes questions: this one is not notified.
+        deleted = self.questions[:4]
+        Question.objects.filter(pk__in=[q.pk for q in deleted]).delete()
+
+        quizz = self.generate(count=12, locale=self.locale)
+        self.assertEqual(
+            quizz.questions_total,
+            8,
+            "Questions deleted elsewhere are never inserted, even if still in the pool",
+        )
+
+        with mock.patch(
+            "quizz.pools.time.monotonic", return_value=time.monotonic() + 60
+        ):
+            self.assertEqual(
+                len(question_pool.candidates(locale=self.locale.pk)),
+                8,
+                "The pool is rebuilt once the database is checked again",
+            )
+
+    def test_slug_collisions_are_retried(self):
+        Quizz.objects.create(slug="taken")
+
+        with mock.patch(
+            "quizz.models.quizzes.generate_slug", side_effect=["taken", "free"]
+        ):
+            quizz = Quizz.objects.create()
+
+        self.assertEqual(quizz.slug, "free")
+
+    def test_pooled_quizzes_are_claimed(self):
+        pooled = self.generate(pooled=True)
+        self.assertIsNotNone(pooled.pool_key)
+
+        self.assertEqual(
+            self.generate(tags=[self.parent_tag]).pool_key,
+            None,
+            "Quizzes with tags are never taken from the pool",
+        )
+        self.assertTrue(Quizz.objects.filter(pk=pooled.pk, pool_key__isnull=False))
+
+        claimed = self.generate(ip="127.0.0.1")
+        self.assertEqual(claimed.pk, pooled.pk)
+        self.assertIsNone(claimed.pool_key)
+        self.assertEqual(claimed.ip, "127.0.0.1")
+
+        self.assertNotEqual(self.generate().pk, pooled.pk, "Claimed only once")
+
+    def test_pooled_quizzes_are_discarded_when_questions_change(self):
+        pooled = self.generate(pooled=True)
+        question = pooled.all_questions[0].question
+        question.save()
+
+        self.assertFalse(Quizz.objects.filter(pk=pooled.pk).exists())
+
+    def test_refill_quizzes_pool_command(self):
+        with self.settings(QUIZZ_WARM_POOL_CRITERIA=[{"questions_count": 5}]):
+            call_command("refill_quizzes_pool", size=3, stdout=StringIO())
+            call_command("refill_quizzes_pool", size=3, stdout=StringIO())
+
+        self.assertEqual(Quizz.objects.filter(pool_key="5:0::").count(), 3)
+
+    def test_unseen_questions_are_preferred(self):
+        user = User.objects.create(username="sommelier")
+
+        quizz = self.generate(user=user)
+        for question in quizz.all_questions:
+            self.assertTrue(question.register_answer({"answers": []}, quizz=quizz))
+
+        seen = {question.question_id for question in quizz.all_questions}
+        seen_questions = Profile.seen_questions_of(user)
+        self.assertEqual(
+            {
+                question.pk
+                for question in self.questions
+                if question.pk in seen_questions
+            },
+            seen,
+            "Answered questions are recorded as seen",
+        )
+
+        quizz = self.generate(user=user, count=2, prefer_unseen=True)
+        self.assertFalse(
+            {question.question_id for question in quizz.all_questions} & seen,
+            "Only unseen questions are selected if there are enough",
+        )
+
+    def test_adaptive_quizzes_review_failed_questions_first(self):
+        user = User.objects.create(username="sommelier")
+
+        quizz = self.generate(user=user, count=4)
+        failed = set()
+        for question in quizz.all_questions:
+            # Checking the incorrect answer fails the question.
+            incorrect = question.question.answers.get(is_correct=False)
+            question.register_answer({"answers": [str(incorrect.pk)]}, quizz=quizz)
+            failed.add(question.question_id)
+
+        self.assertEqual(
+            set(user.questions_reviews.values_list("question_id", flat=True)), failed
+        )
+
+        # Failed questions are due for review ten minutes later.
+        user.questions_reviews.update(next_review_at=timezone.now())
+
+        quizz = self.generate(user=user, count=4, adaptive=True)
+        self.assertEqual(
+            {question.question_id for question in quizz.all_questions}, failed
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.generate(
+                user=user,
+                count=4,
+                adaptive=True,
+                types_mix={QUESTION_MCQ: 50, QUESTION_OPEN: 50},
+            )
+        reviews_queries = [
+            query["sql"] for query in queries if "quizz_questionreview" in query["sql"]
+        ]
+        self.assertEqual(
+            len(reviews_queries), 1, "The reviews are loaded once for all types"
+        )
+        self.assertNotIn(
+            " IN (", reviews_queries[0], "The candidates are not sent to the database"
+        )
+
+
+class OnCommitTestCase(QuizzesMixin, TransactionTestCase):
+    # Caches and statistics are updated once transactions are committed.
+
+    def test_reports_of_users_are_not_revalidated(self):
+        user = User.objects.create(username="sommelier")
+        quizz = self.generate(count=1, user=user)
+        quizz.current_question.register_answer({"answers": []}, quizz=quizz)
+        quizz.finish_if_answered()
+        url = reverse("quizz:quizz", args=(quizz.slug,))
+
+        self.client.force_login(user)
+        self.assertFalse(self.client.get(url).has_header("ETag"))
+
+        # The navigation bar shows the ongoing quizzes, which change.
+        ongoing = [self.generate(count=1, user=user) for _ in range(2)]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, 200)
+        for ongoing_quizz in ongoing:
+            self.assertContains(response, ongoing_quizz.slug)
+
+    def test_ongoing_quizzes_are_cached(self):
+        user = User.objects.create(username="sommelier")
+        first = self.generate(count=2, user=user)
+        second = self.generate(count=2, user=user)
+
+        def ongoing():
+            return [
+                (summary["slug"], summary["questions_finished"])
+                for summary in Quizz.ongoing_quizzes_of(user)
+            ]
+
+        self.assertEqual(ongoing(), [(first.slug, 0), (second.slug, 0)])
+        with self.assertNumQueries(0):
+            ongoing()
+
+        first.current_question.register_answer({"answers": []}, quizz=first)
+        self.assertEqual(ongoing(), [(first.slug, 1), (second.slug, 0)])
+
+        first.current_question.register_answer({"answers": []}, quizz=first)
+        first.finish_if_answered()
+        self.assertEqual(ongoing(), [(second.slug, 0)])
+
+        summary = Quizz.ongoing_quizzes_of(user)
+        with transaction.atomic():
+            third = self.generate(count=2, user=user)
+            # Another request caches the summary before the quizz is committed,
+            # so without it.
+            cache.set(Quizz.ongoing_quizzes_cache_key(user.pk), summary)
+        self.assertEqual(ongoing(), [(second.slug, 0), (third.slug, 0)])
+
+        self.client.force_login(user)
+        self.assertContains(self.client.get(reverse("quizz:create-quizz")), third.slug)
+
+    def test_statistics_are_counted_incrementally(self):
+        user = User.objects.create(username="sommelier")
+        deleted = self.generate(count=3, user=user)
+        self.generate(count=2, ip="192.0.2.1")
+        self.generate(count=2, ip="192.0.2.1")
+        self.generate(count=4, ip="192.0.2.2", pooled=True)
+
+        quizz = self.generate(count=1, user=user)
+        quizz.current_question.register_answer({"answers": []}, quizz=quizz)
+        quizz.finish_if_answered()
+
+        deleted.delete()
+        Question.create_open(question="Deleted", answer="Answer").delete()
+
+        statistics = Statistics.current()
+        self.assertEqual(
+            {field: getattr(statistics, field) for field in Statistics.collect()},
+            Statistics.collect(),
+        )
+        self.assertEqual(
+            (statistics.anonymous, statistics.quizzes, statistics.started_quizzes),
+            (1, 1, 3),
+        )
+
+        today = DailyStatistics.objects.get(date=timezone.localdate())
+        self.assertEqual((today.users, today.started_quizzes, today.quizzes), (1, 4, 1))
+
+    def test_statistics_are_counted_after_commit(self):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                self.generate(count=2, ip="192.0.2.1")
+
+            self.assertFalse(
+                any("statistics" in query["sql"] for query in queries),
+                "The statistics are not locked while the quizz is created",
+            )
+
+        self.assertEqual(Statistics.current().started_quizzes_questions, 2)
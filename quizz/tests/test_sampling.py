@@ -0,0 +1,82 @@
+import random
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from ..sampling import allocate, difficulty_weight, weighted_sample
+
+
+class SamplingTestCase(SimpleTestCase):
+    def test_difficulty_weight(self):
+        self.assertEqual(difficulty_weight(2, 2), 180, "Same difficulty is favored")
+        self.assertEqual(difficulty_weight(1, 2), 120, "Slightly easier is favored")
+        self.assertEqual(difficulty_weight(1, 3), 90, "Way easier is disfavored")
+        self.assertEqual(difficulty_weight(3, 0), 100, "Indifferent is neutral")
+
+    def test_weighted_sample_without_replacement(self):
+        population = list(range(100))
+        sample = weighted_sample(population, [1] * 100, 30)
+
+        self.assertEqual(len(sample), 30)
+        self.assertEqual(len(set(sample)), 30, "Items are selected only once")
+
+        self.assertEqual(
+            sorted(weighted_sample(population, [1] * 100, 150)),
+            population,
+            "If more items are requested than available, all are returned",
+        )
+
+        self.assertEqual(
+            weighted_sample(["a", "b", "c"], [0, 1, -1], 3),
+            ["b"],
+            "Items with non-positive weights are never selected",
+        )
+
+    def test_weighted_sample_with_priorities(self):
+        population = list(range(20))
+        priorities = [0 if item % 4 == 0 else 1 for item in population]
+
+        self.assertEqual(
+            sorted(weighted_sample(population, [1] * 20, 5, priorities=priorities)),
+            [0, 4, 8, 12, 16],
+            "Items with a lower priority are selected first",
+        )
+        self.assertEqual(
+            len(set(weighted_sample(population, [1] * 20, 8, priorities=priorities))),
+            8,
+            "Items with a higher priority fill the sample if needed",
+        )
+
+    def test_weighted_sample_follows_weights(self):
+        rng = random.Random(42)
+        draws = Counter(
+            weighted_sample(["light", "heavy"], [1, 9], 1, rng=rng)[0]
+            for _ in range(10000)
+        )
+
+        self.assertAlmostEqual(draws["heavy"] / 10000, 0.9, delta=0.02)
+
+    def test_allocate(self):
+        self.assertEqual(
+            allocate(10, {"a": 60, "b": 20, "c": 20}, {"a": 50, "b": 50, "c": 50}),
+            {"a": 6, "b": 2, "c": 2},
+        )
+        self.assertEqual(
+            sum(
+                allocate(
+                    10, {"a": 1, "b": 1, "c": 1}, {"a": 9, "b": 9, "c": 9}
+                ).values()
+            ),
+            10,
+            "Rounded counts always add up",
+        )
+        self.assertEqual(
+            allocate(10, {"a": 60, "b": 20, "c": 20}, {"a": 50, "b": 1, "c": 0}),
+            {"a": 9, "b": 1, "c": 0},
+            "What a stratum cannot provide is taken from the others",
+        )
+        self.assertEqual(
+            allocate(10, {"a": 1, "b": 0}, {"a": 3, "b": 50}),
+            {"a": 3, "b": 0},
+            "Strata without share are never used",
+        )
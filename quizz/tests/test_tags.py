@@ -0,0 +1,99 @@
+import time
+from unittest import mock
+
+from django.test import TestCase
+
+from ..models import Question, QuestionLocale, Tag
+from ..models.questions import tags_closure
+
+
+def mptt_reduced_tags(question):
+    """
+    The tags reduction, walking the tree with MPTT queries.
+    """
+    tags = question.tags.all()
+    reduced = {tag.pk: (tag, 1) for tag in tags}
+
+    for tag in tags:
+        if tag.is_leaf_node():
+            continue
+
+        if all(child in tags for child in tag.get_descendants()):
+            reduced[tag.pk] = tag, tag.get_descendant_count()
+            for child in tag.get_descendants():
+                reduced.pop(child.pk, None)
+
+    for tag, _ in reduced.copy().values():
+        for parent in tag.get_ancestors():
+            if parent in tags:
+                reduced.pop(parent.pk, None)
+
+    return reduced
+
+
+class TagsTestCase(TestCase):
+    def setUp(self):
+        self.locale = QuestionLocale.objects.create(code="fr_FR", name="Français")
+
+        self.wine = Tag.objects.create(name="Vin")
+        self.red = Tag.objects.create(name="Rouge", parent=self.wine)
+        self.pinot = Tag.objects.create(name="Pinot noir", parent=self.red)
+        self.merlot = Tag.objects.create(name="Merlot", parent=self.red)
+        self.white = Tag.objects.create(name="Blanc", parent=self.wine)
+        self.chardonnay = Tag.objects.create(name="Chardonnay", parent=self.white)
+
+    def question(self, *tags):
+        question = Question.create_open(
+            question="Question", answer="Answer", locale=self.locale, tags=tags
+        )
+        return Question.objects.get(pk=question.pk)
+
+    def test_reduced_tags_match_the_tree(self):
+        # A parent and part of its children: only the children are kept.
+        partial = self.question(self.red, self.pinot)
+        self.assertEqual(partial.reduced_tags, {self.pinot.pk: (self.pinot, 1)})
+
+        # A parent and all its children: only the parent is kept.
+        complete = self.question(self.red, self.pinot, self.merlot)
+        self.assertEqual(complete.reduced_tags, {self.red.pk: (self.red, 2)})
+
+        questions = [
+            partial,
+            complete,
+            self.question(self.pinot, self.chardonnay),
+            self.question(self.wine, self.white, self.chardonnay),
+            self.question(
+                self.wine,
+                self.red,
+                self.pinot,
+                self.merlot,
+                self.white,
+                self.chardonnay,
+            ),
+        ]
+        for question in questions:
+            self.assertEqual(question.reduced_tags, mptt_reduced_tags(question))
+
+    def test_closure_is_rebuilt_when_tags_change(self):
+        self.assertEqual(
+            tags_closure.descendants(self.red.pk), {self.pinot.pk, self.merlot.pk}
+        )
+
+        gamay = Tag.objects.create(name="Gamay", parent=self.red)
+        self.assertIn(gamay.pk, tags_closure.descendants(self.red.pk))
+        self.assertIn(self.red.pk, tags_closure.ancestors(gamay.pk))
+
+        self.pinot.delete()
+        self.assertNotIn(self.pinot.pk, tags_closure.descendants(self.red.pk))
+        self.assertNotIn(self.pinot.pk, tags_closure.descendants(self.wine.pk))
+
+        # Changes made by other processes are not signaled to this one.
+        Tag.objects.filter(pk=self.merlot.pk).update(parent=self.white)
+        self.assertIn(self.merlot.pk, tags_closure.descendants(self.red.pk))
+
+        with mock.patch(
+            "quizz.models.questions.time.monotonic",
+            return_value=time.monotonic() + tags_closure.MAX_AGE + 1,
+        ):
+            self.assertNotIn(self.merlot.pk, tags_closure.descendants(self.red.pk))
+            self.assertIn(self.merlot.pk, tags_closure.descendants(self.white.pk))
@@ -1,6 +1,10 @@
 from django.test import TestCase
 
-from ..text_processors import normalize, gentle_levenshtein_distance
+from ..text_processors import (
+    normalize,
+    gentle_levenshtein_distance,
+    normalized_levenshtein_distance,
+)
 
 
 class TextProcessorsTestCase(TestCase):
@@ -80,3 +84,9 @@ class TextProcessorsTestCase(TestCase):
             0,
             "The gentle Levenshtein distance allows mixed punctuation",
         )
+
+    def test_normalized_levenshtein_distance(self):
+        self.assertEqual(
+            normalized_levenshtein_distance(normalize("Côte-Rôtie"), "cote rotie"),
+            gentle_levenshtein_distance("Côte-Rôtie", "cote rotie"),
+        )
@@ -3,6 +3,9 @@ import string
 from Levenshtein import distance
 from unidecode import unidecode
 
+"""The translation table removing punctuation, built once."""
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
 
 def gentle_levenshtein_distance(string1, string2):
     """
@@ -16,6 +19,18 @@ def gentle_levenshtein_distance(string1, string2):
     return distance(normalize(string1), normalize(string2))
 
 
+def normalized_levenshtein_distance(normalized_string, raw_string):
+    """
+    Same as `gentle_levenshtein_distance`, but with a string already
+    normalized, so that only the other one has to be.
+
+    :param normalized_string: A string already normalized (see `normalize`).
+    :param raw_string: The other string, raw.
+    :return: The Levenshtein distance.
+    """
+    return distance(normalized_string, normalize(raw_string))
+
+
 def normalize(raw_string):
     """
     Normalizes a string, removing accents, punctuation, multiple spaces,
@@ -24,9 +39,4 @@ def normalize(raw_string):
     :param raw_string:The raw string.
     :return: The normalized string.
     """
-    return " ".join(
-        unidecode(raw_string)
-        .lower()
-        .translate(str.maketrans("", "", string.punctuation))
-        .split()
-    )
+    return " ".join(unidecode(raw_string).lower().translate(PUNCTUATION_TABLE).split())
@@ -1,8 +1,21 @@
 from django.urls import include, path
 
-from .views.public.quizzes import QuizzView, CreateQuizzView, UserQuizzesListView
+from .views.public.quizzes import (
+    QuizzView,
+    CreateQuizzView,
+    UserQuizzesListView,
+    QuizzOfflineView,
+    QuizzBundleView,
+)
 from .views.public.pages import LegalView
 
+from .views.api.quizzes import (
+    CreateQuizzAPIView,
+    CurrentQuestionAPIView,
+    AnswerAPIView,
+    ReportAPIView,
+)
+
 from .views.management.data_import import QuestionsImportView, UndoImportView
 from .views.management.questions import (
     QuestionsListView,
@@ -33,11 +46,24 @@ management_patterns = (
     "management",
 )
 
+api_patterns = (
+    [
+        path("quizzes", CreateQuizzAPIView.as_view(), name="create-quizz"),
+        path("quizz/<slug:slug>/question", CurrentQuestionAPIView.as_view(), name="quizz-question"),
+        path("quizz/<slug:slug>/answer", AnswerAPIView.as_view(), name="quizz-answer"),
+        path("quizz/<slug:slug>/report", ReportAPIView.as_view(), name="quizz-report"),
+    ],
+    "api",
+)
+
 urlpatterns = [
     path("", CreateQuizzView.as_view(), name="create-quizz"),
     path("quizzes", UserQuizzesListView.as_view(), name="user-quizzes"),
     path("quizz/<slug:slug>", QuizzView.as_view(), name="quizz"),
+    path("quizz/<slug:slug>/offline", QuizzOfflineView.as_view(), name="quizz-offline"),
+    path("quizz/<slug:slug>/bundle", QuizzBundleView.as_view(), name="quizz-bundle"),
     path("legal", LegalView.as_view(), name="legal"),
     path("management/", include(management_patterns, namespace="management")),
+    path("api/", include(api_patterns, namespace="api")),
 ]
 # fmt: on
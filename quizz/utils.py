@@ -1,3 +1,7 @@
+from django.db import connections, router, transaction
+from django.db.models import Max
+
+
 # noinspection PyPep8Naming
 def as_choices(Enum):
     """
@@ -7,3 +11,95 @@ def as_choices(Enum):
     :return: The choices in a format usable by Django.
     """
     return ((key.value, key) for key in Enum)
+
+
+class _AmbiguousBulkCreate(Exception):
+    pass
+
+
+def bulk_create(model, objects, link):
+    """
+    Saves the given model instances using a constant amount of queries,
+    setting their primary keys.
+
+    Not all database backends return the primary keys of rows created with a
+    bulk insert (neither SQLite nor MySQL do). As we need them to link the
+    instances to others, for these backends the new rows are selected again
+    after the insert, in the same transaction: they are the rows created after
+    the last existing one that are not linked yet. This relies on all these
+    instances being linked in the same transaction, so that committed rows are
+    always linked.
+
+    If the new rows cannot be told apart this way, the instances are saved
+    one by one instead.
+
+    :param model: The model class of the instances.
+    :param objects: A list of unsaved instances.
+    :param link: The name of the relation the instances are about to be linked
+                 by (e.g. a reverse many-to-many relation).
+    :return: The list of saved instances.
+    """
+    using = router.db_for_write(model)
+    features = connections[using].features
+
+    # This feature was renamed in Django 3.0.
+    if getattr(
+        features,
+        "can_return_rows_from_bulk_insert",
+        getattr(features, "can_return_ids_from_bulk_insert", False),
+    ):
+        return model.objects.using(using).bulk_create(objects)
+
+    if not objects:
+        return objects
+
+    try:
+        with transaction.atomic(using=using):
+            last_pk = (
+                model.objects.using(using).aggregate(last_pk=Max("pk"))["last_pk"] or 0
+            )
+            model.objects.using(using).bulk_create(objects)
+
+            # Rows of a bulk insert are created in order.
+            pks = list(
+                model.objects.using(using)
+                .filter(pk__gt=last_pk, **{f"{link}__isnull": True})
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            if len(pks) != len(objects):
+                raise _AmbiguousBulkCreate
+    except _AmbiguousBulkCreate:
+        for instance in objects:
+            instance.save(using=using)
+        return objects
+
+    for instance, pk in zip(objects, pks):
+        instance.pk = pk
+        instance._state.adding = False
+        instance._state.db = using
+
+    return objects
+
+
+class Bitmap:
+    """
+    A compact set of non-negative integers (e.g. primary keys), stored as a
+    bytes string where the n-th bit is set if n is in the set.
+    """
+
+    def __init__(self, data=None):
+        self.data = bytearray(data or b"")
+
+    def __contains__(self, n):
+        index = n >> 3
+        return index < len(self.data) and bool(self.data[index] & (1 << (n & 7)))
+
+    def __bytes__(self):
+        return bytes(self.data)
+
+    def add(self, n):
+        index = n >> 3
+        if index >= len(self.data):
+            self.data.extend(bytes(index - len(self.data) + 1))
+        self.data[index] |= 1 << (n & 7)
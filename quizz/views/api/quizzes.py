@@ -0,0 +1,225 @@
+import hashlib
+import json
+
+from django.http import Http404, JsonResponse, QueryDict
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
+from django.middleware.csrf import get_token
+from django.views import View
+from django.views.decorators.csrf import ensure_csrf_cookie
+
+from quizz.forms.public import CreateQuizzForm
+from quizz.models import Quizz
+from quizz.views.api.serializers import serialize_question, serialize_report
+from quizz.views.public.quizzes import generate_quizz_from_form
+
+
+def request_data(request):
+    """
+    Returns the data sent with a request, either as JSON (if the request's
+    content type says so) or as a regular form.
+
+    :param request: The request.
+    :return: A dict-like object with the data.
+    :raises ValueError: If the JSON data is malformed.
+    """
+    if request.content_type != "application/json":
+        return request.POST
+
+    data = json.loads(request.body.decode("utf-8") or "{}")
+    if not isinstance(data, dict):
+        raise ValueError("JSON data must be an object.")
+
+    # Forms expect strings, and lists only for multiple fields.
+    query_dict = QueryDict(mutable=True)
+    for key, value in data.items():
+        if isinstance(value, list):
+            query_dict.setlist(key, [str(item) for item in value])
+        elif isinstance(value, bool):
+            if value:
+                query_dict[key] = "on"
+        elif value is not None:
+            query_dict[key] = str(value)
+
+    return query_dict
+
+
+def conditional_json_response(request, data, etag):
+    """
+    Returns a JSON response for a resource that does not change as long as its
+    ETag is the same, or a 304 response if the client already has it.
+
+    :param request: The request.
+    :param data: A callable returning the data to serialize, only called if
+                 the client doesn't already have the resource.
+    :param etag: The resource's ETag, quoted.
+    :return: A response.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(data())
+
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+
+    return response
+
+
+class QuizzAPIMixin:
+    """
+    The API views working on an existing quizz, identified by its slug.
+    """
+
+    def get_quizz(self):
+        quizz = get_object_or_404(
+            Quizz, slug=self.kwargs["slug"], pool_key__isnull=True
+        )
+
+        # Quizzes created before their totals were stored have no questions
+        # count, so their questions are counted.
+        if not quizz.is_accessible_by(self.request.user) or not quizz.questions_total:
+            raise Http404("User is not allowed to access this quizz.")
+
+        return quizz
+
+
+@method_decorator(ensure_csrf_cookie, name="dispatch")
+class CreateQuizzAPIView(View):
+    """
+    Creates a quizz. Takes the same data as the quizz creation form, as a form
+    or as JSON; returns the new quizz' slug and its questions count.
+
+    A GET request returns (and sets as a cookie) the CSRF token required to
+    create a quizz, for new clients.
+    """
+
+    http_method_names = ["get", "head", "post", "options"]
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({"csrf_token": get_token(request)})
+
+    def post(self, request, *args, **kwargs):
+        try:
+            form = CreateQuizzForm(request_data(request))
+        except ValueError:
+            return JsonResponse({"error": "Malformed data."}, status=400)
+
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        quizz = generate_quizz_from_form(request, form)
+
+        if not quizz:
+            return JsonResponse(
+                {"error": "No question satisfies these criteria."}, status=404
+            )
+
+        return JsonResponse(
+            {
+                "slug": quizz.slug,
+                "questions_total": quizz.questions_count,
+                "url": reverse("quizz:api:quizz-question", args=(quizz.slug,)),
+            },
+            status=201,
+        )
+
+
+@method_decorator(ensure_csrf_cookie, name="dispatch")
+class CurrentQuestionAPIView(QuizzAPIMixin, View):
+    """
+    The current question of a running quizz, without its answers. A question
+    never changes until it's answered (or edited), so it's served with an
+    ETag and clients can revalidate it without downloading it again.
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, *args, **kwargs):
+        quizz = self.get_quizz()
+        question = quizz.current_question
+
+        if not question:
+            return JsonResponse(
+                {
+                    "finished": True,
+                    "report": reverse("quizz:api:quizz-report", args=(quizz.slug,)),
+                }
+            )
+
+        quizz.start_current_question()
+
+        # The snapshot changes whenever the question or its answers are edited.
+        digest = hashlib.md5(repr(question.question.snapshot).encode("utf-8"))
+
+        return conditional_json_response(
+            request,
+            lambda: {
+                "finished": False,
+                "questions_total": quizz.questions_total,
+                "questions_left": quizz.questions_left,
+                "question": serialize_question(question),
+            },
+            f'"{quizz.slug}-{question.order}-{digest.hexdigest()}"',
+        )
+
+
+class AnswerAPIView(QuizzAPIMixin, View):
+    """
+    Answers the current question of a running quizz. Takes the same data as
+    the question's form, as a form or as JSON. If an `order` is given, the
+    answer is only registered if it's the current question's one, so a retried
+    request never answers the next question.
+    """
+
+    http_method_names = ["post", "options"]
+
+    def post(self, request, *args, **kwargs):
+        quizz = self.get_quizz()
+        question = quizz.current_question
+
+        if not question:
+            return JsonResponse({"error": "This quizz is finished."}, status=409)
+
+        try:
+            data = request_data(request)
+        except ValueError:
+            return JsonResponse({"error": "Malformed data."}, status=400)
+
+        if "order" in data and data["order"] != str(question.order):
+            return JsonResponse(
+                {"error": "This question was already answered."}, status=409
+            )
+
+        # register_answer returns False if the form was not valid.
+        if not question.register_answer(data, quizz=quizz):
+            return JsonResponse({"error": "Invalid answer."}, status=400)
+
+        quizz.finish_if_answered()
+
+        return JsonResponse(
+            {"finished": not quizz.is_running, "questions_left": quizz.questions_left}
+        )
+
+
+class ReportAPIView(QuizzAPIMixin, View):
+    """
+    The report of a finished quizz. It only changes if the quizz is
+    re-graded or its questions edited, so it's served with an ETag built from
+    its points and the reports version.
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, *args, **kwargs):
+        quizz = self.get_quizz()
+
+        if quizz.is_running:
+            return JsonResponse({"error": "This quizz is not finished."}, status=409)
+
+        return conditional_json_response(
+            request,
+            lambda: serialize_report(quizz),
+            f'"{quizz.slug}-{Quizz.reports_version()}-{quizz.user_points}"',
+        )
@@ -0,0 +1,117 @@
+import random
+
+from django.db.models import prefetch_related_objects
+
+from quizz.models import Quizz, QuestionSnapshot
+
+
+def serialize_question(quizz_question):
+    """
+    Returns what's needed to display a question, without its answers.
+
+    :param quizz_question: The QuizzQuestion instance.
+    :return: A dict, ready to be serialized.
+    """
+    snapshot = quizz_question.question.snapshot
+    question = {
+        "order": quizz_question.order,
+        "type": snapshot.type,
+        "question": snapshot.question,
+        "illustration": snapshot.illustration,
+    }
+
+    if quizz_question.question.is_mcq:
+        question["choices"] = [[pk, answer] for pk, answer, _ in snapshot.choices]
+        question["has_open_choice"] = snapshot.has_open_choice
+        random.shuffle(question["choices"])
+
+    elif quizz_question.question.is_linked:
+        question["items"] = [list(answer) for answer, _ in snapshot.pairs]
+        question["targets"] = [list(linked) for _, linked in snapshot.pairs]
+        random.shuffle(question["items"])
+        random.shuffle(question["targets"])
+
+    return question
+
+
+def serialize_report(quizz):
+    """
+    Returns the report of a finished quizz: the totals, and for each question,
+    the user's answers alongside the valid ones.
+
+    The answers come from the user's answers, so the report shows what was
+    actually answered even if the questions' answers were replaced since; the
+    rest of the questions come from their snapshots. The whole report needs
+    three queries at most, whatever the amount of questions: the quizz'
+    questions, the missing snapshots, and the user's answers.
+
+    :param quizz: The Quizz instance.
+    :return: A dict, ready to be serialized.
+    """
+    questions = quizz.progress.questions
+    QuestionSnapshot.prefetch(question.question for question in questions)
+    prefetch_related_objects(questions, Quizz.prefetch_report_answers())
+
+    user_points, max_points, _ = quizz.points
+
+    return {
+        "slug": quizz.slug,
+        "finished_at": quizz.finished_at.isoformat() if quizz.finished_at else None,
+        "user_points": user_points,
+        "max_points": max_points,
+        "score": quizz.score,
+        "perfect_answers": quizz.perfect_answers,
+        "almost_answers": quizz.almost_answers,
+        "failed_answers": quizz.failed_answers,
+        "questions": [_serialize_report_question(question) for question in questions],
+    }
+
+
+def _serialize_report_question(quizz_question):
+    """
+    :param quizz_question: The QuizzQuestion instance, with its answers
+                           prefetched.
+    :return: A dict, ready to be serialized.
+    """
+    snapshot = quizz_question.question.snapshot
+    question = {
+        "order": quizz_question.order,
+        "type": snapshot.type,
+        "question": snapshot.question,
+        "illustration": snapshot.illustration,
+        "max_points": snapshot.difficulty,
+        "points": quizz_question.points,
+        "success": quizz_question.success,
+    }
+
+    if quizz_question.question.is_open or snapshot.has_open_choice:
+        question["open_answer"] = quizz_question.open_answer
+        question["open_valid_answer"] = snapshot.open_valid_answer
+
+    user_answers = quizz_question.answers.all()
+
+    if quizz_question.question.is_mcq:
+        question["choices"] = [
+            {
+                "pk": answer.proposed_answer.pk,
+                "answer": answer.proposed_answer.answer,
+                "is_correct": answer.proposed_answer.is_correct,
+                "is_checked": bool(answer.is_checked),
+            }
+            for answer in user_answers
+        ]
+
+    elif quizz_question.question.is_linked:
+        question["pairs"] = [
+            {
+                "answer": [answer.proposed_answer.pk, answer.proposed_answer.answer],
+                "linked_answer": [
+                    answer.proposed_answer.linked_answer.pk,
+                    answer.proposed_answer.linked_answer.answer,
+                ],
+                "linked_to": answer.linked_to_id,
+            }
+            for answer in user_answers
+        ]
+
+    return question
@@ -1,18 +1,48 @@
-from datetime import timedelta, datetime
+import json
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Sum, F, FloatField, Count, Case, When, IntegerField
-from django.http import HttpResponseRedirect, Http404, HttpResponseNotAllowed
+from django.http import (
+    HttpResponseRedirect,
+    Http404,
+    HttpResponseNotAllowed,
+    JsonResponse,
+)
 from django.shortcuts import get_object_or_404
-from django.urls import reverse_lazy
-from django.utils import timezone
-from django.utils.translation import gettext_lazy as _
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.translation import get_language, gettext_lazy as _
 from django.views.generic import DetailView, FormView, ListView, TemplateView
 from ipware import get_client_ip
 
 from quizz.forms.public import CreateQuizzForm
-from quizz.models import Quizz, QuizzQuestion
+from quizz.models import Quizz, QuizzQuestion, QuestionSnapshot
+from quizz.views.api.serializers import serialize_question
+
+
+def generate_quizz_from_form(request, form):
+    """
+    Generates a quizz for the current user, following the criteria of a
+    valid CreateQuizzForm.
+
+    :param request: The current request.
+    :param form: The valid form.
+    :return: The generated quizz, or None if no question matches the criteria.
+    """
+    ip, _routable = get_client_ip(request)
+    return Quizz.generate_quizz(
+        user=request.user,
+        ip=ip,
+        questions_count=form.cleaned_data["how_many"],
+        locale=form.cleaned_data["locale"],
+        contest=form.cleaned_data["contest"],
+        tags=form.cleaned_data["tags"],
+        difficulty=int(form.cleaned_data["difficulty"] or 0),
+        prefer_unseen=form.cleaned_data["prefer_unseen"],
+        adaptive=form.cleaned_data["adaptive"],
+        types_mix=form.cleaned_data["types"],
+    )
 
 
 class CreateQuizzView(FormView):
@@ -20,16 +50,7 @@ class CreateQuizzView(FormView):
     template_name = "public/quizz-create.html"
 
     def form_valid(self, form):
-        ip, _routable = get_client_ip(self.request)
-        quizz = Quizz.generate_quizz(
-            user=self.request.user,
-            ip=ip,
-            questions_count=form.cleaned_data["how_many"],
-            locale=form.cleaned_data["locale"],
-            contest=form.cleaned_data["contest"],
-            tags=form.cleaned_data["tags"],
-            difficulty=int(form.cleaned_data["difficulty"]),
-        )
+        quizz = generate_quizz_from_form(self.request, form)
 
         if not quizz:
             messages.error(
@@ -65,21 +86,7 @@ class QuizzView(DetailView):
         :param quizz: The quizz to check access for.
         :raises Http404: If the user is not allowed to access this quizz.
         """
-        # For ongoing quizzes, only the owner is allowed to access the quizz, or
-        # everyone but only if the owner is anonymous.
-        allowed = (quizz.user is None and not self.request.user.is_authenticated) or (
-            quizz.user == self.request.user
-        )
-
-        # If the quizz is finished, we also allow users with the permission to
-        # view quizzes to view all quizzes.
-        if not quizz.is_running:
-            allowed |= (
-                self.request.user.is_authenticated
-                and self.request.user.has_perm("quizz.view_quizz")
-            )
-
-        if not allowed:
+        if not quizz.is_accessible_by(self.request.user):
             raise Http404("User is not allowed to access this quizz.")
 
     def get_template_names(self):
@@ -89,7 +96,7 @@ class QuizzView(DetailView):
             return ["public/quizz-report.html"]
 
     def get_queryset(self):
-        return super().get_queryset().prefetch_related("questions")
+        return super().get_queryset().filter(pool_key__isnull=True)
 
     def get_object(self, queryset=None):
         quizz: Quizz = super(QuizzView, self).get_object(queryset=queryset)
@@ -97,29 +104,59 @@ class QuizzView(DetailView):
         self.check_allowed(quizz)
 
         # Rotten quizz (somehow)
-        if quizz.questions_total == 0:
+        if quizz.is_running and quizz.questions_total == 0:
             quizz.delete()
             raise Http404
 
-        if (
-            quizz.is_running
-            and quizz.current_question
-            and (
-                not quizz.current_question.started_at
-                or timezone.now() - quizz.current_question.started_at
-                > timedelta(hours=1)
-            )
-        ):
-            quizz.current_question.started_at = timezone.now()
-            quizz.current_question.save()
+        if quizz.is_running:
+            quizz.start_current_question()
 
         return quizz
 
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+
+        if self.object.is_running:
+            return self.render_to_response(self.get_context_data(object=self.object))
+
+        reports_version = Quizz.reports_version()
+        context = self.get_context_data(
+            object=self.object, reports_version=reports_version
+        )
+
+        # The rest of the page may change anytime for logged-in users (e.g.
+        # their ongoing quizzes in the navigation bar), or if there are
+        # messages to display: these pages are rendered again, with the report
+        # itself from the cache.
+        if request.user.is_authenticated or len(messages.get_messages(request)):
+            return self.render_to_response(context)
+
+        # Else, a finished quizz only changes if it's re-graded or its
+        # questions are edited, so its report can be revalidated by the
+        # browser.
+        etag = (
+            f'"{self.object.slug}-{reports_version}-{self.object.user_points}'
+            f'-{get_language()}"'
+        )
+        last_modified = int(self.object.finished_at.timestamp())
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self.render_to_response(context)
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+
+        return response
+
     def post(self, request, *args, **kwargs):
         if "slug" not in kwargs or not kwargs["slug"]:
             raise Http404
 
-        quizz = get_object_or_404(Quizz, slug=kwargs["slug"])
+        quizz = get_object_or_404(Quizz, slug=kwargs["slug"], pool_key__isnull=True)
 
         self.check_allowed(quizz)
 
@@ -130,7 +167,7 @@ class QuizzView(DetailView):
             return HttpResponseNotAllowed(["GET", "OPTIONS", "HEAD"])
 
         # register_answer returns False if the form was not valid.
-        if not question.register_answer(request.POST):
+        if not question.register_answer(request.POST, quizz=quizz):
             messages.error(
                 request,
                 _(
@@ -141,9 +178,7 @@ class QuizzView(DetailView):
             )
 
         # If it's the last question of the quizz, we mark it as, well, finished.
-        if quizz.questions_left == 0:
-            quizz.finished_at = timezone.now()
-            quizz.save()
+        quizz.finish_if_answered()
 
         # We always redirect to ourself. Either the quizz is not finished, and
         # the next question will be displayed, either it is and the summary
@@ -151,6 +186,83 @@ class QuizzView(DetailView):
         return HttpResponseRedirect(reverse_lazy("quizz:quizz", args=(quizz.slug,)))
 
 
+class QuizzOfflineView(QuizzView):
+    """
+    The page to pass a whole quizz offline: the questions are downloaded at
+    once (see QuizzBundleView) and answered in the browser, and all the answers
+    are then submitted at once.
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    def get_template_names(self):
+        if self.object.is_running:
+            return ["public/quizz-offline.html"]
+        else:
+            return ["public/quizz-report.html"]
+
+
+class QuizzBundleView(QuizzView):
+    """
+    The whole quizz at once, as JSON: GET returns all the questions left, in
+    a compact bundle without their answers; POST receives all the answers at
+    once, in the same format as the questions forms' data, by question order:
+
+        {"answers": {"0": {"answers": ["42"]}, "1": {"answer": "Syrah"}}}
+    """
+
+    def get(self, request, *args, **kwargs):
+        quizz = self.get_object()
+        questions = [
+            question
+            for question in quizz.progress.questions
+            if not question.is_finished
+        ]
+
+        QuestionSnapshot.prefetch(question.question for question in questions)
+
+        return JsonResponse(
+            {
+                "slug": quizz.slug,
+                "finished": not quizz.is_running,
+                "questions_total": quizz.questions_total,
+                "questions": [serialize_question(question) for question in questions],
+            }
+        )
+
+    def post(self, request, *args, **kwargs):
+        if "slug" not in kwargs or not kwargs["slug"]:
+            raise Http404
+
+        quizz = get_object_or_404(Quizz, slug=kwargs["slug"], pool_key__isnull=True)
+
+        self.check_allowed(quizz)
+
+        if not quizz.is_running:
+            return HttpResponseNotAllowed(["GET", "OPTIONS", "HEAD"])
+
+        try:
+            answers = json.loads(request.body.decode("utf-8"))["answers"]
+            # Each answer is given to its question's form as its data.
+            if not isinstance(answers, dict) or not all(
+                isinstance(data, dict) for data in answers.values()
+            ):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({"error": "Malformed answers."}, status=400)
+
+        # register_answers returns False if any answer was not valid.
+        if not quizz.register_answers(answers):
+            return JsonResponse({"error": "Invalid answers."}, status=400)
+
+        return JsonResponse(
+            {
+                "finished": not quizz.is_running,
+                "url": reverse("quizz:quizz", args=(quizz.slug,)),
+            }
+        )
+
+
 class QuizzesListMixin(ListView):
     template_name = "public/quizz-list.html"
 
@@ -166,33 +278,6 @@ class QuizzesListMixin(ListView):
         return (
             self.get_base_queryset()
             .filter(finished_at__isnull=False)
-            .annotate(
-                score=Sum("questions__points", output_field=FloatField())
-                / Sum("questions__question__difficulty", output_field=FloatField())
-                * 100,
-                questions_count=Count("questions"),
-                perfect_answers=Sum(
-                    Case(
-                        When(questions__success="PERFECT", then=1),
-                        default=0,
-                        output_field=IntegerField(),
-                    )
-                ),
-                almost_answers=Sum(
-                    Case(
-                        When(questions__success="ALMOST", then=1),
-                        default=0,
-                        output_field=IntegerField(),
-                    )
-                ),
-                failed_answers=Sum(
-                    Case(
-                        When(questions__success="FAILED", then=1),
-                        default=0,
-                        output_field=IntegerField(),
-                    )
-                ),
-            )
             .prefetch_related("user", "user__profile")
             .order_by("-finished_at")
         )
@@ -8,4 +8,5 @@ import "./management/question-card"
 import "./management/question-edit"
 
 import "./public/quizz-create"
+import "./public/quizz-offline"
 import "./public/quizz-report"
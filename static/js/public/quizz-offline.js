@@ -0,0 +1,190 @@
+'use strict';
+
+import jQuery from "jquery";
+
+/*
+ * Offline quizz: the whole quizz is downloaded at once, answered in the
+ * browser without any request, and all the answers are submitted at once.
+ *
+ * Answers are kept in the local storage until they are successfully sent,
+ * so nothing is lost if the connection drops in the meantime.
+ */
+jQuery(function($)
+{
+    const $app = $('#quizz-offline .quizz-offline');
+
+    if ($app.length === 0)
+    {
+        return;
+    }
+
+    const bundle_url = $app.data('bundle-url');
+    const storage_key = 'quizz-offline-' + $app.data('slug');
+    const csrf_token = $app.find('input[name=csrfmiddlewaretoken]').val();
+    const $box = $app.find('.box');
+
+    let questions = [];
+    let questions_total = 0;
+    let current = 0;
+    let answers = JSON.parse(window.localStorage.getItem(storage_key) || '{}');
+
+    function save_answers()
+    {
+        window.localStorage.setItem(storage_key, JSON.stringify(answers));
+    }
+
+    function render_answers_form(question)
+    {
+        let $form = $('<div class="answers-form" />');
+
+        if (question.type === 'OPEN')
+        {
+            $form.append($('<textarea class="textarea" rows="3" />').attr('name', 'answer'));
+        }
+        else if (question.type === 'MCQ')
+        {
+            question.choices.forEach(function(choice)
+            {
+                $form.append(
+                    $('<label class="checkbox" />')
+                        .append($('<input type="checkbox" name="answers" />').val(choice[0]))
+                        .append(' ')
+                        .append($('<span />').text(choice[1]))
+                        .add('<br />')
+                );
+            });
+
+            if (question.has_open_choice)
+            {
+                $form.append(
+                    $('<input class="input" type="text" name="other_answer" />')
+                        .attr('placeholder', $app.data('label-other'))
+                );
+            }
+        }
+        else if (question.type === 'LINKED')
+        {
+            question.items.forEach(function(item)
+            {
+                let $select = $('<select />').attr('name', item[0]);
+
+                question.targets.forEach(function(target)
+                {
+                    $select.append($('<option />').val(target[0]).text(target[1]));
+                });
+
+                $form.append(
+                    $('<div class="level" />')
+                        .append($('<div class="level-left" />').append($('<label />').text(item[1])))
+                        .append($('<div class="level-right" />').append($('<div class="select" />').append($select)))
+                );
+            });
+        }
+
+        return $form;
+    }
+
+    function collect_answer($form, question)
+    {
+        let answer = {};
+
+        if (question.type === 'MCQ')
+        {
+            answer.answers = $form.find('input[name=answers]:checked').map(function()
+            {
+                return $(this).val();
+            }).get();
+        }
+
+        $form.find('textarea, input[type=text], select').each(function()
+        {
+            answer[$(this).attr('name')] = $(this).val();
+        });
+
+        return answer;
+    }
+
+    function render_question()
+    {
+        let question = questions[current];
+        let is_last = current === questions.length - 1;
+        let $form = render_answers_form(question);
+
+        let progress = $app.data('label-progress')
+            .replace('{current}', questions_total - questions.length + current + 1)
+            .replace('{total}', questions_total);
+
+        $box.empty()
+            .append($('<h2 class="title" />').text(question.question))
+            .append(question.illustration ? $('<figure class="image" />').append($('<img />').attr('src', question.illustration)) : null)
+            .append($('<div class="is-size-5 is-answer-form" />').append($form))
+            .append(
+                $('<div class="level" />')
+                    .append($('<div class="level-left" />').append(
+                        $('<button class="button is-link is-medium is-next-button" />')
+                            .text($app.data(is_last ? 'label-submit' : 'label-next'))
+                            .on('click', function(e)
+                            {
+                                e.preventDefault();
+
+                                answers[question.order] = collect_answer($form, question);
+                                save_answers();
+
+                                if (is_last)
+                                {
+                                    submit_answers($(this));
+                                }
+                                else
+                                {
+                                    current++;
+                                    render_question();
+                                }
+                            })
+                    ))
+                    .append($('<div class="level-right is-size-5" />').text(progress))
+            );
+    }
+
+    function submit_answers($button)
+    {
+        $button.addClass('is-loading');
+
+        $.ajax({
+            url: bundle_url,
+            method: 'POST',
+            contentType: 'application/json',
+            data: JSON.stringify({answers: answers}),
+            headers: {'X-CSRFToken': csrf_token}
+        })
+        .done(function(response)
+        {
+            window.localStorage.removeItem(storage_key);
+            window.location = response.url;
+        })
+        .fail(function()
+        {
+            $button.removeClass('is-loading');
+            $box.find('.notification').remove();
+            $box.prepend($('<div class="notification is-danger" />').text($app.data('label-error')));
+        });
+    }
+
+    $.getJSON(bundle_url, function(bundle)
+    {
+        // Questions already answered (but not submitted) are skipped.
+        questions = bundle.questions;
+        questions_total = bundle.questions_total;
+        current = Math.min(
+            questions.filter(function(question) { return question.order in answers; }).length,
+            questions.length - 1
+        );
+
+        if (bundle.finished || questions.length === 0)
+        {
+            window.location.reload();
+            return;
+        }
+
+        render_question();
+    });
+});
@@ -1,3 +1,4 @@
 from .django import *
 from .images import *
 from .social_auth import *
+from .quizz import *
@@ -0,0 +1,10 @@
+# Quizzes generated in advance
+# Quizzes matching these criteria are generated in advance by the
+# `refill_quizzes_pool` management command, so users asking for them get a
+# quizz instantly. Criteria are the arguments of `Quizz.generate_quizz`, with
+# locale and contest given as primary keys.
+
+QUIZZ_WARM_POOL_CRITERIA = [{"questions_count": 10, "difficulty": 0}]
+
+# How many quizzes to keep available for each criteria.
+QUIZZ_WARM_POOL_SIZE = 20